@@ -0,0 +1,171 @@
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+from Metrics import ADMISSION_REJECTIONS, AGENT_RUNS_IN_FLIGHT, AGENT_RUNS_QUEUED
+
+
+class Rejected(Exception):
+    """Request shed before any model or tool call; maps to HTTP 429 with Retry-After."""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"{reason}, retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+########################### RATE LIMIT #######################################
+class TokenBucket:
+    """Refills `rate` tokens per second up to `burst`; one token per agent run."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self):
+        """Takes a token and returns 0, or returns the seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def refund(self):
+        self.tokens = min(self.burst, self.tokens + 1)
+
+
+########################### ADMISSION #######################################
+class Admission:
+    """Per-client token buckets in front of a global cap on concurrent agent runs.
+
+    Runs beyond `max_concurrent` wait in a FIFO queue of at most `max_queue`
+    requests for up to `queue_timeout` seconds; anything beyond that is rejected
+    straight away with an estimate of when to retry, so clients back off
+    instead of piling up behind slow upstream calls.
+    """
+
+    def __init__(self, rate_per_minute=10, burst=5, max_concurrent=4, max_queue=8, queue_timeout=30, max_clients=10000):
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_clients = max_clients
+        self.running = 0
+        self.waiting = 0
+        self.rejected = {"rate_limited": 0, "queue_full": 0, "queue_timeout": 0}
+        self._buckets = OrderedDict()
+        self._slots = asyncio.Semaphore(max_concurrent)
+        # Moving average of run time, used to estimate Retry-After when the queue is full
+        self._avg_run_seconds = 20.0
+
+    def _reject(self, reason, retry_after):
+        self.rejected[reason] += 1
+        ADMISSION_REJECTIONS.labels(reason=reason).inc()
+        return Rejected(reason.replace("_", " "), max(1, math.ceil(retry_after)))
+
+    def _bucket(self, client):
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.rate, self.burst)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(client)
+        return bucket
+
+    async def _take_token(self, client, pace):
+        bucket = self._bucket(client)
+        wait = bucket.take()
+        while wait and pace:
+            # Batch items are paced to the client's rate instead of being rejected
+            await asyncio.sleep(wait)
+            wait = bucket.take()
+        if wait:
+            raise self._reject("rate_limited", wait)
+        return bucket
+
+    def _queue_estimate(self):
+        return self._avg_run_seconds * math.ceil((self.waiting + 1) / self.max_concurrent)
+
+    async def _take_slot(self):
+        if self._slots.locked():
+            if self.waiting >= self.max_queue:
+                raise self._reject("queue_full", self._queue_estimate())
+            self.waiting += 1
+            AGENT_RUNS_QUEUED.inc()
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise self._reject("queue_timeout", self._queue_estimate()) from None
+            finally:
+                self.waiting -= 1
+                AGENT_RUNS_QUEUED.dec()
+        else:
+            await self._slots.acquire()
+        self.running += 1
+        AGENT_RUNS_IN_FLIGHT.inc()
+
+    async def acquire(self, client, pace=False):
+        """Admits one agent run for client or raises Rejected.
+
+        Returns a release callable; calling it more than once is harmless.
+        """
+        bucket = await self._take_token(client, pace)
+        try:
+            await self._take_slot()
+        except Rejected:
+            # Shed for load, not for this client's rate: don't charge them for it
+            bucket.refund()
+            raise
+
+        started = time.monotonic()
+        released = False
+
+        def release():
+            nonlocal released
+            if released:
+                return
+            released = True
+            self._avg_run_seconds = 0.8 * self._avg_run_seconds + 0.2 * (time.monotonic() - started)
+            self.running -= 1
+            AGENT_RUNS_IN_FLIGHT.dec()
+            self._slots.release()
+
+        return release
+
+    @asynccontextmanager
+    async def run(self, client, pace=False):
+        release = await self.acquire(client, pace)
+        try:
+            yield
+        finally:
+            release()
+
+    def stats(self):
+        return {
+            "running": self.running,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "rate_per_minute": self.rate * 60,
+            "burst": self.burst,
+            "clients": len(self._buckets),
+            "rejected": dict(self.rejected),
+        }
+
+
+def admission_from_env():
+    return Admission(
+        rate_per_minute=float(os.getenv("RATE_LIMIT_PER_MINUTE", "10")),
+        burst=float(os.getenv("RATE_LIMIT_BURST", "5")),
+        max_concurrent=int(os.getenv("MAX_CONCURRENT_RUNS", "4")),
+        max_queue=int(os.getenv("MAX_QUEUED_RUNS", "8")),
+        queue_timeout=float(os.getenv("QUEUE_TIMEOUT_SECONDS", "30")),
+    )
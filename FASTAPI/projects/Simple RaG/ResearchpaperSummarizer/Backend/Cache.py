@@ -0,0 +1,179 @@
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+########################### KEYS #######################################
+def normalize_query(query):
+    """Case, punctuation and whitespace differences map to the same key."""
+    query = re.sub(r"[^\w\s]", " ", str(query).lower())
+    return " ".join(query.split())
+
+
+########################### MEMORY TIER #######################################
+class TTLCache:
+    """In-memory LRU with a per-entry time to live."""
+
+    def __init__(self, max_entries=1024, ttl_seconds=24 * 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.time() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+########################### SQLITE TIER #######################################
+class SQLiteCache:
+    """Optional on-disk tier so cached lookups survive restarts.
+
+    Every call does blocking disk I/O; async code goes through ToolCache.aget().
+    Expired and least recently used rows are pruned every ``evict_every`` writes.
+    """
+
+    def __init__(self, path, max_entries=20000, ttl_seconds=7 * 24 * 3600, evict_every=100):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.evict_every = evict_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        # Eviction walks rows by last_used; without an index that sorts the whole table
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_last_used ON cache (last_used)")
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE cache SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return row[0]
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl_seconds, now),
+            )
+            self._writes += 1
+            if self._writes % self.evict_every == 0:
+                self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM cache WHERE expires_at < ?", (now,))
+        self._conn.execute(
+            "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+########################### TWO-TIER CACHE #######################################
+class ToolCache:
+    """Memory tier in front of an optional SQLite tier, with hit-rate counters.
+
+    get() and set() may touch the disk tier: call them from a worker thread, or use aget().
+    """
+
+    def __init__(self, memory, disk=None):
+        self.memory = memory
+        self.disk = disk
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _memory_get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            with self._lock:
+                self.memory_hits += 1
+        return value
+
+    def _disk_get(self, key):
+        value = self.disk.get(key) if self.disk is not None else None
+        if value is not None:
+            self.memory.set(key, value)
+        with self._lock:
+            if value is not None:
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+        return value
+
+    def get(self, key):
+        value = self._memory_get(key)
+        return value if value is not None else self._disk_get(key)
+
+    async def aget(self, key):
+        """get() for the event loop: memory hits inline, the SQLite tier in a worker thread."""
+        value = self._memory_get(key)
+        if value is not None or self.disk is None:
+            return value if value is not None else self._disk_get(key)
+        return await asyncio.to_thread(self._disk_get, key)
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def stats(self):
+        with self._lock:
+            total = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / total, 4) if total else 0.0,
+                "memory_entries": len(self.memory),
+                "disk_entries": len(self.disk) if self.disk is not None else None,
+            }
+
+
+def tool_cache_from_env():
+    ttl = float(os.getenv("TOOL_CACHE_TTL_SECONDS", str(24 * 3600)))
+    memory = TTLCache(max_entries=int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "1024")), ttl_seconds=ttl)
+    sqlite_path = os.getenv("TOOL_CACHE_SQLITE")
+    disk = SQLiteCache(sqlite_path, ttl_seconds=ttl) if sqlite_path else None
+    return ToolCache(memory, disk)
@@ -0,0 +1,72 @@
+"""Import-time report for the backend.
+
+Runs ``python -X importtime -c "import <module>"`` in a fresh interpreter and
+summarises the output by top-level package, so a cold start can be measured
+before and after a dependency change:
+
+    python ImportTime.py            # profile app.py
+    python ImportTime.py --top 25   # more rows
+    python ImportTime.py --module Tools
+"""
+import argparse
+import re
+import subprocess
+import sys
+import time
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def profile(module):
+    """Returns (wall seconds, [(self_us, cumulative_us, depth, name), ...]) for importing module."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        sys.exit(proc.stderr)
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((int(self_us), int(cumulative_us), len(indent) // 2, name))
+    return wall, rows
+
+
+def by_package(rows):
+    """Self time summed per top-level package (the whole cost of pulling that dependency in)."""
+    totals = {}
+    for self_us, _, _, name in rows:
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise python -X importtime for a backend module")
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    wall, rows = profile(args.module)
+    total_us = sum(row[0] for row in rows)
+
+    print(f"import {args.module}: {wall:.2f}s wall, {total_us / 1e6:.2f}s in imports, {len(rows)} modules\n")
+
+    print(f"{'package':<32}{'self ms':>10}{'share':>8}")
+    for package, self_us in by_package(rows)[:args.top]:
+        print(f"{package:<32}{self_us / 1000:>10.1f}{self_us / total_us:>8.1%}")
+
+    print(f"\n{'slowest imports (cumulative)':<48}{'ms':>10}")
+    slowest = sorted(rows, key=lambda row: row[1], reverse=True)
+    for _, cumulative_us, depth, name in slowest[:args.top]:
+        print(f"{'  ' * min(depth, 4) + name:<48}{cumulative_us / 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
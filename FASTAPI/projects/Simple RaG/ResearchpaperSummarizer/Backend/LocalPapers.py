@@ -0,0 +1,200 @@
+"""Offline paper index: PDFs from a local folder, chunked, embedded locally and stored in FAISS.
+
+Build (or refresh) the index once:
+
+    python LocalPapers.py ingest --papers ./papers --index ./paper_index
+
+The agent then gets a ``local_papers`` tool next to Arxiv and Wikipedia. With
+OFFLINE=1 it is the only tool and the embedding model is loaded from the local
+Hugging Face cache only (download it once with network access, or point
+LOCAL_EMBEDDING_MODEL at a directory).
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from functools import lru_cache
+
+
+PAPERS_DIR = os.getenv("LOCAL_PAPERS_DIR", "papers")
+INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", "paper_index")
+EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBED_BATCH_SIZE = int(os.getenv("LOCAL_EMBED_BATCH_SIZE", "64"))
+TOP_K = int(os.getenv("LOCAL_PAPERS_TOP_K", "4"))
+# Chunks less similar than this (cosine, -1..1) to the query are not relevant
+MIN_SIMILARITY = float(os.getenv("LOCAL_PAPERS_MIN_SIMILARITY", "0.3"))
+
+# Same splitter settings as the interview backend
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 150
+
+MANIFEST = "manifest.json"
+
+
+def offline():
+    return os.getenv("OFFLINE", "").lower() in ("1", "true", "yes")
+
+
+########################### EMBEDDINGS #######################################
+@lru_cache(maxsize=1)
+def get_embeddings():
+    if offline():
+        # Never reach for the Hub: resolve the model from the local cache only
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL,
+        encode_kwargs={"batch_size": EMBED_BATCH_SIZE, "normalize_embeddings": True},
+    )
+
+
+def embed_in_batches(embeddings, texts, batch_size=EMBED_BATCH_SIZE):
+    vectors = []
+    for start in range(0, len(texts), batch_size):
+        vectors.extend(embeddings.embed_documents(texts[start:start + batch_size]))
+    return vectors
+
+
+########################### INGEST #######################################
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_manifest(index_dir):
+    try:
+        with open(os.path.join(index_dir, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def ingest(papers_dir=PAPERS_DIR, index_dir=INDEX_DIR, force=False):
+    """Chunk and embed every PDF in papers_dir and save a FAISS index to index_dir.
+
+    Skipped when the folder, embedding model and chunk settings match the saved manifest.
+    Returns the manifest.
+    """
+    from langchain_community.document_loaders import PyPDFLoader
+    from langchain_community.vectorstores import FAISS
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    pdfs = sorted(name for name in os.listdir(papers_dir) if name.lower().endswith(".pdf"))
+    if not pdfs:
+        raise ValueError(f"No PDF files found in {papers_dir}")
+
+    manifest = {
+        "embedding_model": EMBEDDING_MODEL,
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "files": {name: file_sha256(os.path.join(papers_dir, name)) for name in pdfs},
+    }
+    previous = read_manifest(index_dir)
+    if not force and previous and all(previous.get(key) == value for key, value in manifest.items()):
+        print(f"Index in {index_dir} is up to date ({len(pdfs)} papers)")
+        return previous
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    texts, metadatas = [], []
+    for name in pdfs:
+        pages = PyPDFLoader(os.path.join(papers_dir, name)).load()
+        for chunk in splitter.split_documents(pages):
+            texts.append(chunk.page_content)
+            metadatas.append({"paper": os.path.splitext(name)[0], "page": chunk.metadata.get("page", 0) + 1})
+
+    start = time.perf_counter()
+    embeddings = get_embeddings()
+    vectors = embed_in_batches(embeddings, texts)
+    store = FAISS.from_embeddings(list(zip(texts, vectors)), embeddings, metadatas=metadatas)
+    store.save_local(index_dir)
+
+    manifest["chunks"] = len(texts)
+    with open(os.path.join(index_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Indexed {len(pdfs)} papers, {len(texts)} chunks in {time.perf_counter() - start:.1f}s -> {index_dir}")
+    return manifest
+
+
+########################### SEARCH #######################################
+@lru_cache(maxsize=1)
+def load_index(index_dir=INDEX_DIR):
+    from langchain_community.vectorstores import FAISS
+
+    manifest = read_manifest(index_dir)
+    if manifest is None:
+        return None
+    if manifest["embedding_model"] != EMBEDDING_MODEL:
+        raise ValueError(
+            f"{index_dir} was built with {manifest['embedding_model']}, not {EMBEDDING_MODEL}; re-run ingest"
+        )
+    # The index is our own file written by ingest(), so loading its pickled docstore is safe
+    return FAISS.load_local(index_dir, get_embeddings(), allow_dangerous_deserialization=True)
+
+
+def max_distance(min_similarity):
+    """FAISS IndexFlatL2 scores are squared L2 distances; on unit vectors that is 2 - 2*cos (0 to 4)."""
+    return 2 - 2 * min_similarity
+
+
+def search(store, query, k=TOP_K, min_similarity=MIN_SIMILARITY):
+    hits = store.similarity_search_with_score(query, k=k)
+    hits = [(doc, score) for doc, score in hits if score <= max_distance(min_similarity)]
+    if not hits:
+        return "No matching paper in the local library."
+    return "\n\n".join(
+        f"[{doc.metadata['paper']}, p.{doc.metadata['page']}]\n{doc.page_content}" for doc, _ in hits
+    )
+
+
+def local_papers_tool(index_dir=INDEX_DIR):
+    """Agent tool over the saved index, or None when no index has been built."""
+    from langchain_core.tools import StructuredTool
+
+    store = load_index(index_dir)
+    if store is None:
+        return None
+
+    def local_papers(query: str) -> str:
+        return search(store, query)
+
+    return StructuredTool.from_function(
+        func=local_papers,
+        name="local_papers",
+        description=(
+            "Search the local library of research paper PDFs. Input is a paper title or topic. "
+            "Returns matching passages with paper name and page number."
+        ),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the local paper index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("ingest", help="chunk, embed and index a folder of PDFs")
+    build.add_argument("--papers", default=PAPERS_DIR)
+    build.add_argument("--index", default=INDEX_DIR)
+    build.add_argument("--force", action="store_true", help="rebuild even if the manifest matches")
+    query = sub.add_parser("search", help="query the saved index")
+    query.add_argument("query")
+    query.add_argument("--index", default=INDEX_DIR)
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        ingest(args.papers, args.index, force=args.force)
+    else:
+        store = load_index(args.index)
+        if store is None:
+            parser.error(f"No index in {args.index}; run ingest first")
+        start = time.perf_counter()
+        print(search(store, args.query))
+        print(f"\n({(time.perf_counter() - start) * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import time
+from langchain_core.callbacks import AsyncCallbackHandler
+from prometheus_client import Counter, Gauge, Histogram
+
+
+########################### METRICS #######################################
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+REQUEST_LATENCY = Histogram(
+    "research_http_request_duration_seconds",
+    "HTTP request latency by endpoint",
+    ["method", "path", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+AGENT_ERRORS = Counter(
+    "research_agent_errors_total",
+    "Agent runs that raised, by exception type",
+    ["error_type"],
+)
+TOOL_CALLS = Counter(
+    "research_tool_calls_total",
+    "Tool calls by tool and outcome",
+    ["tool", "outcome"],
+)
+TOOL_DURATION = Histogram(
+    "research_tool_duration_seconds",
+    "Tool call duration by tool",
+    ["tool"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_FIRST_TOKEN = Histogram(
+    "research_llm_time_to_first_token_seconds",
+    "Time from model call start to first streamed token",
+    buckets=LATENCY_BUCKETS,
+)
+LLM_GENERATION = Histogram(
+    "research_llm_generation_seconds",
+    "Total duration of one model call",
+    buckets=LATENCY_BUCKETS,
+)
+TOKENS = Counter(
+    "research_llm_tokens_total",
+    "Prompt and completion tokens across all model calls",
+    ["kind"],
+)
+TOKENS_PER_REQUEST = Histogram(
+    "research_llm_tokens_per_request",
+    "Prompt and completion tokens used by one agent run",
+    ["kind"],
+    buckets=TOKEN_BUCKETS,
+)
+AGENT_STEPS = Histogram(
+    "research_agent_steps",
+    "Model calls (agent steps) per agent run",
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15, 20),
+)
+ADMISSION_REJECTIONS = Counter(
+    "research_admission_rejections_total",
+    "Requests shed with 429 before running the agent, by reason",
+    ["reason"],
+)
+AGENT_RUNS_IN_FLIGHT = Gauge(
+    "research_agent_runs_in_flight",
+    "Agent runs currently holding a concurrency slot",
+)
+AGENT_RUNS_QUEUED = Gauge(
+    "research_agent_runs_queued",
+    "Agent runs waiting for a concurrency slot",
+)
+
+
+########################### HTTP MIDDLEWARE #######################################
+class RequestLatencyMiddleware:
+    """Pure ASGI middleware recording REQUEST_LATENCY when the last body chunk is sent.
+
+    Unlike an @app.middleware("http") function, which only sees the response once
+    its headers are ready, this covers the whole body of streamed responses.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        observed = False
+
+        def observe():
+            nonlocal observed
+            if observed:
+                return
+            observed = True
+            # Route template, not the raw URL, keeps label cardinality bounded
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            REQUEST_LATENCY.labels(method=scope["method"], path=path, status=str(status)).observe(
+                time.perf_counter() - start
+            )
+
+        async def send_and_observe(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                observe()
+
+        try:
+            await self.app(scope, receive, send_and_observe)
+        finally:
+            # Errors and client disconnects before the final chunk
+            observe()
+
+
+########################### CALLBACKS #######################################
+class AgentMetrics(AsyncCallbackHandler):
+    """Per-run callback handler: records tool and model timings, tokens and steps.
+
+    Create one per agent run and call ``finish()`` once the run is over.
+    """
+
+    def __init__(self):
+        self._tool_starts = {}
+        self._llm_starts = {}
+        self._first_token_seen = set()
+        self.steps = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    async def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._tool_starts[run_id] = ((serialized or {}).get("name") or kwargs.get("name") or "unknown", time.perf_counter())
+
+    async def on_tool_end(self, output, *, run_id, **kwargs):
+        self._finish_tool(run_id, "ok")
+
+    async def on_tool_error(self, error, *, run_id, **kwargs):
+        self._finish_tool(run_id, "error")
+
+    def _finish_tool(self, run_id, outcome):
+        started = self._tool_starts.pop(run_id, None)
+        if started is None:
+            return
+        name, start = started
+        TOOL_CALLS.labels(tool=name, outcome=outcome).inc()
+        TOOL_DURATION.labels(tool=name).observe(time.perf_counter() - start)
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._llm_starts[run_id] = time.perf_counter()
+        self.steps += 1
+
+    async def on_llm_new_token(self, token, *, run_id, **kwargs):
+        if run_id in self._first_token_seen or run_id not in self._llm_starts:
+            return
+        self._first_token_seen.add(run_id)
+        LLM_FIRST_TOKEN.observe(time.perf_counter() - self._llm_starts[run_id])
+
+    async def on_llm_end(self, response, *, run_id, **kwargs):
+        start = self._llm_starts.pop(run_id, None)
+        self._first_token_seen.discard(run_id)
+        if start is not None:
+            LLM_GENERATION.observe(time.perf_counter() - start)
+
+        prompt, completion = 0, 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                prompt += usage.get("input_tokens", 0)
+                completion += usage.get("output_tokens", 0)
+        if not (prompt or completion):
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            prompt = usage.get("prompt_tokens", 0)
+            completion = usage.get("completion_tokens", 0)
+        self.prompt_tokens += prompt
+        self.completion_tokens += completion
+        TOKENS.labels(kind="prompt").inc(prompt)
+        TOKENS.labels(kind="completion").inc(completion)
+
+    def finish(self, error=None):
+        if error is not None:
+            AGENT_ERRORS.labels(error_type=type(error).__name__).inc()
+        AGENT_STEPS.observe(self.steps)
+        TOKENS_PER_REQUEST.labels(kind="prompt").observe(self.prompt_tokens)
+        TOKENS_PER_REQUEST.labels(kind="completion").observe(self.completion_tokens)
@@ -1,12 +1,22 @@
-from langchain_openai import ChatOpenAI
+import os
 from dotenv import load_dotenv
 
 load_dotenv()
+
+# Any OpenAI-compatible server; for offline use point these at a local one (e.g. Ollama, llama.cpp, vLLM)
+LLM_MODEL = os.getenv("LLM_MODEL", "arcee-ai/trinity-large-preview:free")
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "https://openrouter.ai/api/v1")
+
 def model():
+    # Imported on first use so the server can start before the OpenAI client stack is loaded
+    from langchain_openai import ChatOpenAI
     llm = ChatOpenAI(
-    model = "arcee-ai/trinity-large-preview:free",
+    model = LLM_MODEL,
     temperature = 0.9,
-    base_url = "https://openrouter.ai/api/v1",
+    # Stream internally so callbacks see the first token, and ask for token usage
+    streaming = True,
+    stream_usage = True,
+    base_url = LLM_BASE_URL,
     default_headers={
         "HTTP-Referer": "http://localhost:8000",
         "X-Title": "RAG with Langchain"
@@ -1,6 +1,10 @@
 from pydantic import BaseModel, Field
-from typing import Annotated
+from typing import Annotated, List
 
 ########################### PYDANTIC MODEL #######################################
 class Query(BaseModel):
-    query: Annotated[str, Field(description="The query to be processed by the LLM")]
\ No newline at end of file
+    query: Annotated[str, Field(description="The query to be processed by the LLM")]
+
+class BatchQuery(BaseModel):
+    queries: Annotated[List[str], Field(min_length=1, max_length=50, description="Paper titles or topics to analyze")]
+    stream: Annotated[bool, Field(description="Stream NDJSON results as each item completes instead of one JSON list")] = True
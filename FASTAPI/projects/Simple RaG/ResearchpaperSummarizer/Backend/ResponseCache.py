@@ -0,0 +1,162 @@
+import math
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from Cache import normalize_query
+
+
+########################### QUERY EMBEDDING #######################################
+def embed_query(normalized):
+    """Sparse, L2-normalized vector of hashed word and character-trigram features.
+
+    Cheap and local: no embedding API call is needed to decide whether two paper
+    titles are the same request worded differently.
+    """
+    features = {}
+    words = normalized.split()
+    grams = [f"w:{w}" for w in words]
+    for word in words:
+        padded = f" {word} "
+        grams.extend(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    for gram in grams:
+        bucket = zlib.crc32(gram.encode("utf-8")) & 0x3FFFF
+        features[bucket] = features.get(bucket, 0.0) + 1.0
+    norm = math.sqrt(sum(v * v for v in features.values())) or 1.0
+    return {k: v / norm for k, v in features.items()}
+
+
+# Words that don't identify a paper: two queries differing only in these may share an answer
+COMMON_WORDS = frozenset("""
+    a an and are as at be by can do does explain for from give how i in into is it me of on or paper
+    please summarise summarize summary tell the this to using via what whats with you your about
+    overview describe research study
+""".split())
+
+
+def signature(normalized):
+    """Words that identify the paper: anything outside COMMON_WORDS, numbers and versions included.
+
+    Hashed n-gram cosine can't tell "llama 3" from "llama 2" or "bert" from
+    "roberta", so a semantic hit is only allowed between queries with the same signature.
+    """
+    return frozenset(w for w in normalized.split() if w not in COMMON_WORDS or any(c.isdigit() for c in w))
+
+
+def cosine(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(k, 0.0) for k, v in a.items())
+
+
+########################### RESPONSE CACHE #######################################
+class CacheHit(NamedTuple):
+    answer: str
+    kind: str  # "EXACT" or "SEMANTIC"
+    similarity: float
+
+
+class ResponseCache:
+    """Full /llm answers keyed by normalized query, with nearest-neighbour fallback.
+
+    The fallback only compares entries with the same signature (see signature()),
+    so it never crosses paper names or version numbers and a miss scans a handful
+    of entries rather than the whole cache.
+
+    Every entry is tagged with the model version that produced it; entries from
+    another version are treated as misses and dropped.
+    """
+
+    def __init__(self, model_version, threshold=0.9, max_entries=1000, ttl_seconds=7 * 24 * 3600):
+        self.model_version = model_version
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # normalized query -> (answer, model_version, vector, expires_at, signature)
+        self._by_signature = {}  # signature -> set of normalized queries
+        self._lock = threading.Lock()
+
+    def _valid(self, entry, now):
+        return entry[1] == self.model_version and entry[3] >= now
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        group = self._by_signature[entry[4]]
+        group.discard(key)
+        if not group:
+            del self._by_signature[entry[4]]
+
+    def get(self, query) -> Optional[CacheHit]:
+        key = normalize_query(query)
+        sig = signature(key)
+        vector = embed_query(key)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._valid(entry, now):
+                    self._entries.move_to_end(key)
+                    self.exact_hits += 1
+                    return CacheHit(entry[0], "EXACT", 1.0)
+                self._remove(key)
+
+            best_key, best_score = None, 0.0
+            for other_key in list(self._by_signature.get(sig, ())):
+                other = self._entries[other_key]
+                if not self._valid(other, now):
+                    self._remove(other_key)
+                    continue
+                score = cosine(vector, other[2])
+                if score > best_score:
+                    best_key, best_score = other_key, score
+
+            if best_key is not None and best_score >= self.threshold:
+                self._entries.move_to_end(best_key)
+                self.semantic_hits += 1
+                return CacheHit(self._entries[best_key][0], "SEMANTIC", round(best_score, 4))
+
+            self.misses += 1
+            return None
+
+    def set(self, query, answer):
+        """Store an answer; empty ones (e.g. a final message with no text) are never cached."""
+        if not isinstance(answer, str) or not answer.strip():
+            return
+        key = normalize_query(query)
+        sig = signature(key)
+        vector = embed_query(key)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (answer, self.model_version, vector, time.time() + self.ttl_seconds, sig)
+            self._by_signature.setdefault(sig, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def stats(self):
+        with self._lock:
+            total = self.exact_hits + self.semantic_hits + self.misses
+            return {
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.exact_hits + self.semantic_hits) / total, 4) if total else 0.0,
+                "entries": len(self._entries),
+                "threshold": self.threshold,
+                "model_version": self.model_version,
+            }
+
+
+def response_cache_from_env(model_version):
+    return ResponseCache(
+        model_version,
+        threshold=float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.9")),
+        max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000")),
+        ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+    )
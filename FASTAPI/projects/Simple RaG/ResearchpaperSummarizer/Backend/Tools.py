@@ -1,19 +1,106 @@
-from langchain_community.utilities import ArxivAPIWrapper
-from langchain_community.tools import ArxivQueryRun 
-from langchain_community.utilities import WikipediaAPIWrapper
-from langchain_community.tools import WikipediaQueryRun
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from Cache import normalize_query, tool_cache_from_env
+from LocalPapers import local_papers_tool, offline
+
+
+# Shared by every request (and batch item), so repeat lookups never leave the box
+tool_cache = tool_cache_from_env()
+
+
+########################### LIMITS #######################################
+# Per-tool caps on concurrent lookups and seconds per lookup, e.g. ARXIV_CONCURRENCY=4, WIKIPEDIA_TIMEOUT_SECONDS=10
+def tool_setting(tool_name, setting, default):
+    return float(os.getenv(f"{tool_name.upper()}_{setting}", os.getenv(f"TOOL_{setting}", default)))
+
+
+def limited(tool):
+    """Wrap a tool with a result cache, a concurrency cap and a timeout.
+
+    Results are cached by tool name + normalized query. The agent runs independent
+    tool calls from one step concurrently; on timeout the agent gets a short message
+    instead of an exception so it can answer from the other tool.
+
+    The Arxiv / Wikipedia clients are blocking, and a thread can't be cancelled, so
+    each tool gets its own pool of CONCURRENCY threads and a slot is only freed when
+    the lookup really finishes, not when the agent stops waiting for it. A lookup
+    that finishes after its timeout still fills the cache for the next request.
+    """
+    from langchain_core.tools import StructuredTool
+
+    concurrency = int(tool_setting(tool.name, "CONCURRENCY", "8"))
+    timeout = tool_setting(tool.name, "TIMEOUT_SECONDS", "20")
+    semaphore = asyncio.Semaphore(concurrency)
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"tool-{tool.name}")
+
+    def cache_key(query):
+        return f"{tool.name}:{normalize_query(query)}"
+
+    def lookup(query):
+        # Also writes the cache here, in the tool's thread: its SQLite tier must stay off the event loop
+        result = tool.invoke(query)
+        tool_cache.set(cache_key(query), result)
+        return result
+
+    def run(query: str) -> str:
+        cached = tool_cache.get(cache_key(query))
+        if cached is not None:
+            return cached
+        return lookup(query)
+
+    async def arun(query: str) -> str:
+        cached = await tool_cache.aget(cache_key(query))
+        if cached is not None:
+            return cached
+        await semaphore.acquire()
+        try:
+            future = asyncio.get_running_loop().run_in_executor(executor, lookup, query)
+        except BaseException:
+            semaphore.release()
+            raise
+        # Runs once the thread is done, however long after the timeout that is
+        future.add_done_callback(lambda _: semaphore.release())
+        try:
+            # shield: a timeout (or a cancelled request) stops the wait, not the lookup
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            return f"{tool.name} lookup timed out after {timeout:g}s."
+
+    return StructuredTool.from_function(
+        func=run,
+        coroutine=arun,
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+    )
 
 
 ########################### TOOLS #######################################
+def local_tools():
+    # Prebuilt FAISS index of our own PDFs (see LocalPapers.py); absent until someone runs ingest
+    try:
+        local_tool = local_papers_tool()
+    except Exception as e:
+        print(f"Error loading local paper index: {e}")
+        return []
+    return [limited(local_tool)] if local_tool is not None else []
+
+
 def tools():
+    tools = local_tools()
+    if offline():
+        # No network: the local library is the only source
+        return tools
+    # langchain_community, arxiv and wikipedia are imported here, on first agent build, not at startup
     try:
+        from langchain_community.utilities import ArxivAPIWrapper, WikipediaAPIWrapper
+        from langchain_community.tools import ArxivQueryRun, WikipediaQueryRun
         api_wrapper = WikipediaAPIWrapper(top_k=1, doc_content_chars_max=500)
         arxiv_api_wrapper = ArxivAPIWrapper(top_k=2, doc_content_chars_max=1000)
         wiki_tool = WikipediaQueryRun(api_wrapper=api_wrapper)
         arxiv_tool = ArxivQueryRun(api_wrapper=arxiv_api_wrapper)   
-        tools = [wiki_tool, arxiv_tool]
-        return tools
+        tools += [limited(wiki_tool), limited(arxiv_tool)]
     except Exception as e:
         print(f"Error initializing tools: {e}")
-        tools = []
-    
\ No newline at end of file
+    return tools
@@ -1,14 +1,87 @@
 import os
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
-from langchain.agents import create_agent
-from Query import Query
-from Model import model
-from Tools import tools
+import json
+import asyncio
+import logging
+import ipaddress
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from Query import Query, BatchQuery
+from Model import LLM_MODEL, model
+from Tools import tools, tool_cache
 from Prompt import prompt
-app = FastAPI()
+from ResponseCache import response_cache_from_env
+from Cache import normalize_query
+from Admission import Rejected, admission_from_env
+from Metrics import AgentMetrics, RequestLatencyMiddleware
 
-MODEL_VERSION = os.getenv("MODEL_VERSION", "arcee-ai/trinity-large-preview:free")
+logger = logging.getLogger("research_backend")
+
+MODEL_VERSION = os.getenv("MODEL_VERSION", LLM_MODEL)
+
+# Whole /llm answers; entries from another MODEL_VERSION never hit
+response_cache = response_cache_from_env(MODEL_VERSION)
+
+# Per-client rate limit + global cap on concurrent agent runs; cache hits bypass both
+admission = admission_from_env()
+
+# Peers (IPs or CIDR ranges, comma separated) allowed to set X-Client-Id on behalf of their users,
+# e.g. the Streamlit frontend. From anyone else the header is ignored, so it can't dodge the rate limit.
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(entry.strip(), strict=False)
+    for entry in os.getenv("TRUSTED_PROXIES", "").split(",")
+    if entry.strip()
+]
+
+######################## AGENT (built once) #####################################
+def build_agent():
+    # The agent graph, model client and tool integrations are the slow imports; keep them out of startup
+    from langchain.agents import create_agent
+
+    llm = model()
+    agent_tools = tools()
+    return create_agent(
+        model=llm,
+        tools=agent_tools,
+        system_prompt=prompt([tool.name for tool in agent_tools]),
+    )
+
+async def warm_up():
+    try:
+        app.state.agent = await asyncio.to_thread(build_agent)
+        app.state.agent_error = None
+    except Exception as e:
+        app.state.agent_error = str(e)
+        logger.exception("Agent warm-up failed")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Model client, tool wrappers and agent graph are created once and shared by all requests.
+    # They are built in the background so the server accepts connections (and /health) right away.
+    app.state.agent = None
+    app.state.agent_error = None
+    app.state.warm_up = asyncio.create_task(warm_up())
+    yield
+    app.state.warm_up.cancel()
+
+app = FastAPI(lifespan=lifespan)
+
+# Pure ASGI so streamed responses are timed to their last chunk, not to their headers
+app.add_middleware(RequestLatencyMiddleware)
+
+async def get_agent():
+    """The shared agent; requests that arrive during warm-up wait for it instead of building their own."""
+    if app.state.agent is None:
+        warming = getattr(app.state, "warm_up", None)
+        if warming is not None and not warming.done():
+            await asyncio.shield(warming)
+        if app.state.agent is None:
+            # Warm-up failed (or never ran): retry once in this request
+            app.state.agent = await asyncio.to_thread(build_agent)
+            app.state.agent_error = None
+    return app.state.agent
 
 ######################## API Endpoints #####################################
 @app.get("/")
@@ -17,24 +90,215 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    
-    return {"status": "ok", "message": "API is healthy and running.", "model_version": MODEL_VERSION}
+    ready = getattr(app.state, "agent", None) is not None
+    return {
+        "status": "ok" if ready else "warming",
+        "message": "API is healthy and running.",
+        "model_version": MODEL_VERSION,
+        "agent_ready": ready,
+        "agent_error": getattr(app.state, "agent_error", None),
+        "tool_cache": tool_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "admission": admission.stats(),
+    }
 
-@app.post("/llm")
-def main(Query: Query):
-    
-    llm = model()
-    agent = create_agent(
-        model=llm,
-        tools=tools(),
-        system_prompt=prompt(),
+######################## ADMISSION #####################################
+def trusted_proxy(host):
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in TRUSTED_PROXIES)
+
+def client_id(request: Request):
+    peer = request.client.host if request.client else "anonymous"
+    # A trusted proxy (the frontend) names the end user it is forwarding for; everyone else is their peer address
+    forwarded = request.headers.get("X-Client-Id")
+    if forwarded and trusted_proxy(peer):
+        return f"{peer}/{forwarded}"
+    return peer
+
+def rejected_response(e: Rejected):
+    return JSONResponse(
+        status_code=429,
+        content={"error": str(e), "retry_after": e.retry_after},
+        headers={"Retry-After": str(e.retry_after)},
     )
+
+async def run_agent(query, client="anonymous", pace=False):
+    """Answer one query through the response cache, running the agent on a miss.
+
+    Misses go through admission control and may raise Rejected.
+    Returns (answer, cache_status, similarity).
+    """
+    hit = response_cache.get(query)
+    if hit is not None:
+        return hit.answer, f"HIT-{hit.kind}", hit.similarity
+
+    async with admission.run(client, pace=pace):
+        agent = await get_agent()
+        inputs = {"messages": [{"role": "user", "content": query}]}
+        metrics = AgentMetrics()
+        try:
+            # Async run: no threadpool worker is held, and tool calls from one step run concurrently
+            result = await agent.ainvoke(inputs, config={"callbacks": [metrics]})
+        except Exception as e:
+            metrics.finish(error=e)
+            raise
+        metrics.finish()
+
+    answer = result["messages"][-1].content
+    response_cache.set(query, answer)
+    return answer, "MISS", None
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """Prometheus scrape endpoint."""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.post("/llm")
+async def main(Query: Query, request: Request):
+
+    try:
+        answer, cache_status, similarity = await run_agent(Query.query, client_id(request))
+        headers = {"X-Cache": cache_status}
+        if similarity is not None:
+            headers["X-Cache-Similarity"] = str(similarity)
+        return JSONResponse(status_code=200, content={"response": answer}, headers=headers)
+
+    except Rejected as e:
+        return rejected_response(e)
+
+    except Exception as e:
+        logger.exception("Agent run failed for query %r", Query.query)
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+######################## STREAMING #####################################
+def ndjson(event):
+    return json.dumps(event) + "\n"
+
+def text_of(content):
+    # Chat chunks carry either a string or a list of content blocks
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content if isinstance(block, dict))
+
+async def cached_events(hit):
+    yield ndjson({"type": "done", "response": hit.answer, "cache": f"HIT-{hit.kind}"})
+
+async def agent_events(query, release):
+    """Agent progress as NDJSON: tool_start / tool_end / token events, then one done event.
+
+    Runs in an admission slot taken by the endpoint and releases it when done.
+    """
+    answer = ""
+    metrics = AgentMetrics()
     try:
-        inputs = {"messages": [{"role": "user", "content": Query.query}]}
-        result = agent.invoke(inputs)
+        agent = await get_agent()
+        inputs = {"messages": [{"role": "user", "content": query}]}
+        async for event in agent.astream_events(inputs, config={"callbacks": [metrics]}, version="v2"):
+            kind = event["event"]
+            if kind == "on_tool_start":
+                yield ndjson({"type": "tool_start", "tool": event["name"], "input": event["data"].get("input")})
+            elif kind == "on_tool_end":
+                yield ndjson({"type": "tool_end", "tool": event["name"]})
+            elif kind == "on_chat_model_stream":
+                token = text_of(event["data"]["chunk"].content)
+                if token:
+                    yield ndjson({"type": "token", "text": token})
+            elif kind == "on_chat_model_end":
+                # The last model call is the final explanation; earlier ones only pick tools
+                answer = text_of(event["data"]["output"].content)
+
+        metrics.finish()
+        # No text in the final message: stream it as is, but don't serve it to later requests
+        if answer.strip():
+            response_cache.set(query, answer)
+        yield ndjson({"type": "done", "response": answer, "cache": "MISS"})
 
-        answer = result["messages"][-1].content
-        return JSONResponse(status_code=200, content={"response": answer})
-    
     except Exception as e:
-        return JSONResponse(status_code=500, content={"error": str(e)})
\ No newline at end of file
+        metrics.finish(error=e)
+        logger.exception("Streaming agent run failed for query %r", query)
+        yield ndjson({"type": "error", "error": str(e)})
+
+    finally:
+        release()
+
+@app.post("/llm/stream")
+async def stream(Query: Query, request: Request):
+    hit = response_cache.get(Query.query)
+    if hit is not None:
+        events, release = cached_events(hit), None
+    else:
+        # Admit before the 200 goes out, so an overloaded server can still answer 429
+        try:
+            release = await admission.acquire(client_id(request))
+        except Rejected as e:
+            return rejected_response(e)
+        events = agent_events(Query.query, release)
+
+    return StreamingResponse(
+        events,
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Also frees the slot if the stream never starts (client gone before the first byte)
+        background=BackgroundTask(release) if release else None,
+    )
+
+
+######################## BATCH #####################################
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+
+async def batch_results(queries, client="anonymous"):
+    """Run each distinct query once, at most BATCH_CONCURRENCY at a time, yielding results as they finish.
+
+    Titles that normalize to the same key share one agent run. Failures are reported
+    per item. All items share the process-wide tool and response caches. Agent runs
+    are paced to the client's rate limit and still count against the global cap.
+    """
+    groups = {}
+    for index, query in enumerate(queries):
+        groups.setdefault(normalize_query(query), []).append(index)
+
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run_one(indexes):
+        query = queries[indexes[0]]
+        async with semaphore:
+            try:
+                answer, cache_status, _ = await run_agent(query, client, pace=True)
+                return indexes, {"status": "ok", "response": answer, "cache": cache_status}
+            except Rejected as e:
+                return indexes, {"status": "error", "error": str(e), "retry_after": e.retry_after}
+            except Exception as e:
+                logger.exception("Batch item failed for query %r", query)
+                return indexes, {"status": "error", "error": str(e)}
+
+    tasks = [asyncio.create_task(run_one(indexes)) for indexes in groups.values()]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            indexes, outcome = await finished
+            for index in indexes:
+                yield {"index": index, "query": queries[index], **outcome}
+    finally:
+        # Client went away: don't keep running agents nobody will read
+        for task in tasks:
+            task.cancel()
+
+@app.post("/llm/batch")
+async def batch(BatchQuery: BatchQuery, request: Request):
+    queries = BatchQuery.queries
+    client = client_id(request)
+
+    if BatchQuery.stream:
+        async def lines():
+            async for item in batch_results(queries, client):
+                yield ndjson(item)
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
+
+    results = [None] * len(queries)
+    async for item in batch_results(queries, client):
+        results[item["index"]] = item
+    return JSONResponse(status_code=200, content={"results": results})
@@ -1,8 +1,14 @@
+import json
+import uuid
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
 
 # Backend URL
 FASTAPI_URL = "http://researchpaper-backend.centralindia.azurecontainer.io:8000/llm"
+STREAM_URL = f"{FASTAPI_URL}/stream"
+
+TOOL_LABELS = {"arxiv": "Arxiv", "wikipedia": "Wikipedia"}
 
 st.set_page_config(
     page_title="Research Paper Assistant",
@@ -10,6 +16,23 @@ st.set_page_config(
     layout="centered"
 )
 
+
+@st.cache_resource
+def http_session():
+    # One pooled, keep-alive session shared across reruns instead of a new connection per click
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# Stable id for this browser session, so the backend rate-limits each user separately
+# rather than everyone behind this Streamlit server as one client
+if "client_id" not in st.session_state:
+    st.session_state.client_id = str(uuid.uuid4())
+
+
 st.title("📚 Research Paper Assistant")
 st.markdown(
     """
@@ -17,7 +40,7 @@ st.markdown(
     It uses:
     - Wikipedia
     - Arxiv
-    
+
     Enter a research paper title below.
     """
 )
@@ -34,33 +57,74 @@ if st.button("Analyze Paper"):
     if not query.strip():
         st.warning("Please enter a paper title.")
     else:
-        with st.spinner("🔍 Searching tools and analyzing paper..."):
+        status = st.status("🔍 Searching tools and analyzing paper...", expanded=False)
+        st.markdown("### 📄 Explanation")
+        output = st.empty()
+        text = ""
 
-            try:
-                response = requests.post(
-                    FASTAPI_URL,
-                    json={"query": query},
-                    timeout=120
-                )
+        try:
+            # (connect timeout, max seconds between streamed lines) instead of one 120 s deadline
+            with http_session().post(
+                STREAM_URL,
+                json={"query": query},
+                headers={"X-Client-Id": st.session_state.client_id},
+                stream=True,
+                timeout=(5, 120)
+            ) as response:
 
-                if response.status_code == 200:
-                    result = response.json()
-                    st.success("Analysis Complete ✅")
-                    st.markdown("### 📄 Explanation")
-                    st.write(result["response"])
+                if response.status_code == 429:
+                    # Backend is shedding load (rate limit or full queue): say when to retry instead of hanging
+                    retry_after = response.headers.get("Retry-After", "a few")
+                    status.update(label="Server busy", state="error")
+                    st.warning(f"⏳ The server is busy right now. Please try again in {retry_after} seconds.")
 
-                else:
+                elif response.status_code != 200:
+                    status.update(label="Backend error", state="error")
                     st.error(f"Backend Error: {response.status_code}")
                     st.write(response.text)
 
-            except requests.exceptions.ConnectionError:
-                st.error("❌ Could not connect to FastAPI backend.")
-                st.info("Make sure your FastAPI server is running on port 8000.")
-            
-            except requests.exceptions.Timeout:
-                st.error("⏳ Request timed out. Try again.")
-            
-            except Exception as e:
-                st.error(f"Unexpected error: {e}")
-                
+                else:
+                    for line in response.iter_lines(decode_unicode=True):
+                        if not line:
+                            continue
+                        event = json.loads(line)
+
+                        if event["type"] == "tool_start":
+                            tool = TOOL_LABELS.get(event["tool"], event["tool"])
+                            status.write(f"Looking up {tool}…")
+                            # Text before a tool call is the agent thinking, not the explanation
+                            text = ""
+                            output.empty()
+
+                        elif event["type"] == "tool_end":
+                            tool = TOOL_LABELS.get(event["tool"], event["tool"])
+                            status.write(f"✅ {tool} done")
+
+                        elif event["type"] == "token":
+                            text += event["text"]
+                            output.markdown(text + "▌")
+
+                        elif event["type"] == "done":
+                            output.markdown(event["response"] or text)
+                            label = "Analysis Complete ✅"
+                            if event.get("cache", "MISS") != "MISS":
+                                label += " (cached)"
+                            status.update(label=label, state="complete")
+
+                        elif event["type"] == "error":
+                            status.update(label="Backend error", state="error")
+                            st.error(f"Backend Error: {event['error']}")
+
+        except requests.exceptions.ConnectionError:
+            status.update(label="Connection failed", state="error")
+            st.error("❌ Could not connect to FastAPI backend.")
+            st.info("Make sure your FastAPI server is running on port 8000.")
+
+        except requests.exceptions.Timeout:
+            status.update(label="Timed out", state="error")
+            st.error("⏳ Request timed out. Try again.")
+
+        except Exception as e:
+            status.update(label="Unexpected error", state="error")
+            st.error(f"Unexpected error: {e}")
 
@@ -0,0 +1,116 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from typing import List, Optional, Sequence
+
+
+def chunk_hash(text: str) -> str:
+	return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+	"""Persistent (model, chunk hash) -> vector cache with size-bounded LRU eviction."""
+
+	def __init__(self, path: str, max_entries: int = 50000):
+		self.path = path
+		self.max_entries = max_entries
+		self.hits = 0
+		self.misses = 0
+		self._lock = threading.Lock()
+		self._tick = 0
+
+		os.makedirs(os.path.dirname(path) or ".", mode=0o700, exist_ok=True)
+		self._conn = sqlite3.connect(path, check_same_thread=False)
+		self._conn.execute("PRAGMA journal_mode=WAL")
+		self._conn.execute(
+			"""
+			CREATE TABLE IF NOT EXISTS embeddings (
+				model TEXT NOT NULL,
+				hash TEXT NOT NULL,
+				vector BLOB NOT NULL,
+				last_used INTEGER NOT NULL,
+				PRIMARY KEY (model, hash)
+			)
+			"""
+		)
+		self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_lru ON embeddings (last_used)")
+		row = self._conn.execute("SELECT COALESCE(MAX(last_used), 0) FROM embeddings").fetchone()
+		self._tick = row[0]
+		self._conn.commit()
+
+	def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+		keys = [chunk_hash(t) for t in texts]
+		found = {}
+		with self._lock:
+			# SQLite caps bound parameters, so look keys up in slices
+			for start in range(0, len(keys), 500):
+				batch = keys[start:start + 500]
+				placeholders = ",".join("?" * len(batch))
+				rows = self._conn.execute(
+					f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+					[model, *batch],
+				).fetchall()
+				for key, blob in rows:
+					vector = array("f")
+					vector.frombytes(blob)
+					found[key] = vector.tolist()
+
+			if found:
+				self._tick += 1
+				self._conn.executemany(
+					"UPDATE embeddings SET last_used = ? WHERE model = ? AND hash = ?",
+					[(self._tick, model, key) for key in found],
+				)
+				self._conn.commit()
+
+			results = [found.get(key) for key in keys]
+			hit_count = sum(1 for r in results if r is not None)
+			self.hits += hit_count
+			self.misses += len(results) - hit_count
+		return results
+
+	def put_many(self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+		if not texts:
+			return
+		with self._lock:
+			self._tick += 1
+			self._conn.executemany(
+				"INSERT OR REPLACE INTO embeddings (model, hash, vector, last_used) VALUES (?, ?, ?, ?)",
+				[
+					(model, chunk_hash(t), array("f", v).tobytes(), self._tick)
+					for t, v in zip(texts, vectors)
+				],
+			)
+			self._evict()
+			self._conn.commit()
+
+	def _evict(self) -> None:
+		count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+		overflow = count - self.max_entries
+		if overflow > 0:
+			self._conn.execute(
+				"DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+				(overflow,),
+			)
+
+	def stats(self) -> dict:
+		with self._lock:
+			entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+			total = self.hits + self.misses
+			return {
+				"hits": self.hits,
+				"misses": self.misses,
+				"hit_rate": round(self.hits / total, 4) if total else 0.0,
+				"entries": entries,
+				"max_entries": self.max_entries,
+			}
+
+
+def default_cache_path() -> str:
+	# Next to the backend, not in the shared temp dir, where another local user could pre-create it
+	return os.getenv(
+		"EMBEDDING_CACHE_PATH",
+		os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "embeddings.sqlite3"),
+	)
@@ -0,0 +1,125 @@
+from collections import deque
+from typing import Awaitable, Callable, List
+
+# With summarize on, turns wait for compaction; if the summary call keeps failing,
+# the oldest are dropped once there are this many times max_turns of them
+SUMMARY_BACKLOG_FACTOR = 4
+
+
+class ChatHistory:
+	"""Interview Q/A turns with O(1) append, cached rendering and an optional rolling summary.
+
+	Only the most recent ``max_turns`` turns are kept verbatim. With ``summarize``
+	enabled, older completed turns are folded into ``summary`` (see ``compact``)
+	instead of being dropped, so prompts stay bounded however long the interview runs.
+	Skipped questions are folded in too, as "(no answer)".
+	"""
+
+	def __init__(self, max_turns: int = 20, summarize: bool = False, keep_recent: int = 4):
+		self.max_turns = max_turns
+		self.summarize = summarize
+		self.keep_recent = keep_recent
+		self.turns = deque(maxlen=max_turns * SUMMARY_BACKLOG_FACTOR if summarize else max_turns)
+		self.summary = ""
+		self.total = 0
+		self.completed = 0
+		self._rendered = {}
+		self._compacting = False
+
+	def __len__(self) -> int:
+		return self.total
+
+	def __bool__(self) -> bool:
+		return bool(self.turns)
+
+	def add_question(self, question: str) -> None:
+		self.turns.append({"question": question, "answer": ""})
+		self.total += 1
+		self._rendered.clear()
+
+	def record_answer(self, answer: str) -> None:
+		"""Attach the user's answer to the latest question."""
+		if not self.turns or not answer:
+			return
+		last = self.turns[-1]
+		if not last["answer"]:
+			self.completed += 1
+		last["answer"] = answer
+		self._rendered.clear()
+
+	def recent(self, n: int) -> List[dict]:
+		if n <= 0:
+			return []
+		start = max(0, len(self.turns) - n)
+		return [self.turns[i] for i in range(start, len(self.turns))]
+
+	def render_recent(self, n: int = 3) -> str:
+		"""Short Q/A window used in the question prompt."""
+		key = ("recent", n)
+		if key not in self._rendered:
+			self._rendered[key] = "\n".join(
+				f"Q: {item['question']}\nA: {item['answer']}" for item in self.recent(n)
+			)
+		return self._rendered[key]
+
+	def render_transcript(self, limit: int = 20, only_complete: bool = False, include_summary: bool = True) -> str:
+		"""Transcript used for scoring: the rolling summary (if any) followed by recent turns."""
+		key = ("transcript", limit, only_complete, include_summary)
+		if key not in self._rendered:
+			# Filter to only completed Q/A pairs if requested (for scoring)
+			items = [item for item in self.turns if item["answer"]] if only_complete else list(self.turns)
+			window = items[-limit:]
+			text = "\n\n".join(
+				f"Question: {item['question'].strip()}\nAnswer: {item['answer'].strip() or '(no answer)'}"
+				for item in window
+			)
+			if include_summary and self.summary:
+				text = f"Summary of earlier turns:\n{self.summary}\n\n{text}"
+			self._rendered[key] = text
+		return self._rendered[key]
+
+	def needs_compaction(self) -> bool:
+		return self.summarize and not self._compacting and len(self.turns) > self.max_turns
+
+	async def compact(self, summarize: Callable[[str, str], Awaitable[str]]) -> None:
+		"""Fold the oldest turns, all but ``keep_recent``, into the rolling summary.
+
+		``summarize(previous_summary, transcript)`` returns the new summary. The
+		turns stay in place while the model runs so concurrent renders still see them.
+		"""
+		if not self.needs_compaction():
+			return
+		self._compacting = True
+		try:
+			# Unanswered turns included: stopping at a skipped question would stall compaction for good
+			fold = list(self.turns)[: max(0, len(self.turns) - self.keep_recent)]
+			if not fold:
+				return
+			transcript = "\n\n".join(
+				f"Question: {item['question'].strip()}\nAnswer: {item['answer'].strip() or '(no answer)'}"
+				for item in fold
+			)
+			self.summary = await summarize(self.summary, transcript)
+			for item in fold:
+				if self.turns and self.turns[0] is item:
+					self.turns.popleft()
+			self._rendered.clear()
+		finally:
+			self._compacting = False
+
+	def to_dict(self) -> dict:
+		return {
+			"turns": list(self.turns),
+			"summary": self.summary,
+			"total": self.total,
+			"completed": self.completed,
+		}
+
+	@classmethod
+	def from_dict(cls, data: dict, **options) -> "ChatHistory":
+		history = cls(**options)
+		history.turns.extend(data.get("turns", []))
+		history.summary = data.get("summary", "")
+		history.total = data.get("total", len(history.turns))
+		history.completed = data.get("completed", sum(1 for t in history.turns if t.get("answer")))
+		return history
@@ -0,0 +1,118 @@
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, Optional
+
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.faiss import dependable_faiss_import
+
+
+class IndexCache:
+	"""FAISS indexes on disk keyed by document content hash, with a byte quota and LRU eviction.
+
+	Each entry is a directory holding ``index.faiss`` and ``index.pkl`` (the layout
+	``FAISS.save_local`` writes). The directory mtime is bumped on every hit and
+	the least recently used entries are removed once ``max_bytes`` is exceeded.
+	"""
+
+	def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024):
+		self.directory = directory
+		self.max_bytes = max_bytes
+		self.hits = 0
+		self.misses = 0
+		self._lock = threading.Lock()
+		os.makedirs(directory, mode=0o700, exist_ok=True)
+
+	def _path(self, key: str) -> str:
+		return os.path.join(self.directory, key)
+
+	def load(self, key: str, embeddings: Any) -> Optional[FAISS]:
+		path = self._path(key)
+		index_path = os.path.join(path, "index.faiss")
+		if not os.path.exists(index_path):
+			with self._lock:
+				self.misses += 1
+			return None
+
+		faiss = dependable_faiss_import()
+		mmap_flag = getattr(faiss, "IO_FLAG_MMAP", 0) | getattr(faiss, "IO_FLAG_READ_ONLY", 0)
+		try:
+			try:
+				index = faiss.read_index(index_path, mmap_flag)
+			except RuntimeError:
+				# Not every index type supports memory-mapped loading
+				index = faiss.read_index(index_path)
+
+			# Written by save() below, never user supplied
+			with open(os.path.join(path, "index.pkl"), "rb") as f:
+				docstore, index_to_docstore_id = pickle.load(f)
+
+			now = time.time()
+			os.utime(path, (now, now))
+		except (OSError, RuntimeError, EOFError, pickle.UnpicklingError):
+			# Replaced by a concurrent save() or evicted while we read it: rebuild instead
+			with self._lock:
+				self.misses += 1
+			return None
+		with self._lock:
+			self.hits += 1
+		return FAISS(embeddings, index, docstore, index_to_docstore_id)
+
+	def save(self, key: str, store: FAISS) -> None:
+		final_path = self._path(key)
+		tmp_path = tempfile.mkdtemp(dir=self.directory, prefix=".tmp-")
+		try:
+			store.save_local(tmp_path)
+			with self._lock:
+				if os.path.exists(final_path):
+					shutil.rmtree(final_path, ignore_errors=True)
+				os.replace(tmp_path, final_path)
+				self._evict()
+		finally:
+			shutil.rmtree(tmp_path, ignore_errors=True)
+
+	def _entries(self):
+		entries = []
+		for name in os.listdir(self.directory):
+			path = self._path(name)
+			if name.startswith(".tmp-") or not os.path.isdir(path):
+				continue
+			size = sum(
+				os.path.getsize(os.path.join(path, f))
+				for f in os.listdir(path)
+				if os.path.isfile(os.path.join(path, f))
+			)
+			entries.append((os.path.getmtime(path), size, path))
+		return entries
+
+	def _evict(self) -> None:
+		entries = sorted(self._entries())
+		total = sum(size for _, size, _ in entries)
+		for _, size, path in entries:
+			if total <= self.max_bytes:
+				break
+			shutil.rmtree(path, ignore_errors=True)
+			total -= size
+
+	def stats(self) -> dict:
+		with self._lock:
+			entries = self._entries()
+			return {
+				"hits": self.hits,
+				"misses": self.misses,
+				"entries": len(entries),
+				"bytes": sum(size for _, size, _ in entries),
+				"max_bytes": self.max_bytes,
+			}
+
+
+def default_index_dir() -> str:
+	# Next to the backend, not in the shared temp dir: load() unpickles these files,
+	# so no other local user may be able to plant them
+	return os.getenv(
+		"INDEX_CACHE_DIR",
+		os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "indexes"),
+	)
@@ -1,5 +1,7 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from dotenv import load_dotenv
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_cohere import CohereEmbeddings
@@ -10,26 +12,38 @@ from langchain_core.documents import Document
 from langchain_openai import ChatOpenAI
 from langchain_classic.chains.combine_documents import create_stuff_documents_chain
 from pydantic import BaseModel
-
+from functools import lru_cache
+from contextlib import asynccontextmanager
+
+import httpx
+
+from EmbeddingCache import EmbeddingCache, chunk_hash, default_cache_path
+from IndexCache import IndexCache, default_index_dir
+from Sessions import SessionStore
+from Retrieval import DEFAULT_QUERY, retrieve_context
+import Timings
+from Timings import stage
+from Scoring import InterviewScore, ScoreMemo, ScoreParseError, extract_json, normalize_score, transcript_key
+
+import asyncio
+import inspect
+import time
+import hashlib
 import os
 import json
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
 
 load_dotenv()
 
-app = FastAPI(title="AI Interview Prep Backend")
 
-app.add_middleware(
-	CORSMiddleware,
-	allow_origins=["*"],
-	allow_credentials=True,
-	allow_methods=["*"],
-	allow_headers=["*"],
-)
+def load_text(file_path: str, content_type: str) -> str:
+	with stage("parse"):
+		return _load_text(file_path, content_type)
 
 
-def load_text(file_path: str, content_type: str) -> str:
+def _load_text(file_path: str, content_type: str) -> str:
 	if content_type == "application/pdf":
 		loader = PyPDFLoader(file_path)
 		docs = loader.load()
@@ -48,29 +62,105 @@ def load_text(file_path: str, content_type: str) -> str:
 	raise HTTPException(status_code=400, detail="Unsupported file type")
 
 
+EMBEDDING_MODEL = "embed-english-light-v3.0"
+
+# Alternative embedding / chat backends, set through use_backends()
+backend_overrides = {}
+
+
+def use_backends(embeddings=None, chat_model=None):
+	"""Swap in other embedding and chat backends, e.g. the benchmark harness's deterministic fakes."""
+	if embeddings is not None:
+		backend_overrides["embeddings"] = embeddings
+	if chat_model is not None:
+		backend_overrides["chat_model"] = chat_model
+	for cached in (get_embeddings, get_model, get_chain, get_score_model):
+		cached.cache_clear()
+
+
+@lru_cache(maxsize=1)
+def get_embeddings():
+	"""One embedding client for the whole process."""
+	if "embeddings" in backend_overrides:
+		return backend_overrides["embeddings"]
+	return CohereEmbeddings(
+		model=EMBEDDING_MODEL,
+		cohere_api_key=os.getenv("COHERE_API_KEY"),
+	)
+
+
+@lru_cache(maxsize=1)
+def get_embedding_cache():
+	return EmbeddingCache(
+		default_cache_path(),
+		max_entries=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "50000")),
+	)
+
+
+@lru_cache(maxsize=1)
+def get_index_cache():
+	return IndexCache(
+		default_index_dir(),
+		max_bytes=int(os.getenv("INDEX_CACHE_MAX_MB", "512")) * 1024 * 1024,
+	)
+
+
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 150
+
+
+def index_key(content_hash: str, source: str) -> str:
+	# Anything that changes the stored vectors or chunking must be part of the key
+	return chunk_hash(f"{EMBEDDING_MODEL}:{CHUNK_SIZE}:{CHUNK_OVERLAP}:{source}:{content_hash}")
+
+
+def store_chunks(store):
+	"""Chunk texts of an index in insertion order."""
+	return [
+		store.docstore.search(store.index_to_docstore_id[i]).page_content
+		for i in range(store.index.ntotal)
+	]
+
+
+def embed_chunks(chunks):
+	"""Embed chunks, only calling the embedding API for chunks not seen before."""
+	cache = get_embedding_cache()
+	vectors = cache.get_many(EMBEDDING_MODEL, chunks)
+	missing = [i for i, v in enumerate(vectors) if v is None]
+	if missing:
+		with stage("embed"):
+			fresh = get_embeddings().embed_documents([chunks[i] for i in missing])
+		cache.put_many(EMBEDDING_MODEL, [chunks[i] for i in missing], fresh)
+		for i, vector in zip(missing, fresh):
+			vectors[i] = vector
+	return vectors
+
+
+def embed_queries_remote(queries):
+	"""Embed a batch of search queries in one request."""
+	if len(queries) == 1:
+		return [get_embeddings().embed_query(queries[0])]
+	return get_embeddings().embed(queries, input_type="search_query")
+
+
 def split_and_embed(text: str):
-	splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=150)
-	chunks = splitter.split_text(text)
+	with stage("split"):
+		splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+		chunks = splitter.split_text(text)
 	if not chunks:
 		raise HTTPException(status_code=400, detail="No text extracted from document")
 
-	embeddings = CohereEmbeddings(
-		model="embed-english-light-v3.0",
-		cohere_api_key=os.getenv("COHERE_API_KEY"),
-	)
-	vectors = embeddings.embed_documents(chunks)
+	vectors = embed_chunks(chunks)
 	return chunks, vectors
 
 
 def build_store(chunks, vectors, source: str):
-	embeddings = CohereEmbeddings(
-		model="embed-english-light-v3.0",
-		cohere_api_key=os.getenv("COHERE_API_KEY"),
-	)
 	text_embeddings = [(chunk, vector) for chunk, vector in zip(chunks, vectors)]
 	metadatas = [{"source": source, "index": i} for i in range(len(chunks))]
 	
-	return FAISS.from_embeddings(text_embeddings, embeddings, metadatas=metadatas)
+	# Vectors are already computed; the shared client is only used for query embedding
+	with stage("index"):
+		return FAISS.from_embeddings(text_embeddings, get_embeddings(), metadatas=metadatas)
 
 
 prompt = ChatPromptTemplate.from_messages([
@@ -110,60 +200,259 @@ score_prompt = ChatPromptTemplate.from_messages([
 ])
 
 
+summary_prompt = ChatPromptTemplate.from_messages([
+	(
+		"system",
+		"""
+		You maintain a running summary of a mock interview. Merge the earlier summary with the new
+		questions and answers. Keep the topics covered, the strengths and weaknesses shown, and any
+		incorrect answers. Stay under 150 words.
+		""".strip(),
+	),
+	(
+		"user",
+		"Earlier summary:\n{previous_summary}\n\nNew turns:\n{transcript}",
+	),
+])
+
+
 # Step 2: model + document chain
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "https://openrouter.ai/api/v1")
+
+
+def http_settings() -> dict:
+	"""Connection pool limits and timeouts shared by the sync and async LLM clients."""
+	return {
+		"limits": httpx.Limits(
+			max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "100")),
+			max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE", "20")),
+			keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60")),
+		),
+		"timeout": httpx.Timeout(
+			float(os.getenv("LLM_TIMEOUT", "60")),
+			connect=float(os.getenv("LLM_CONNECT_TIMEOUT", "10")),
+		),
+	}
+
+
+@lru_cache(maxsize=1)
+def get_http_clients():
+	settings = http_settings()
+	return httpx.Client(**settings), httpx.AsyncClient(**settings)
+
+
+@lru_cache(maxsize=1)
 def get_model():
+	if "chat_model" in backend_overrides:
+		return backend_overrides["chat_model"]
+	http_client, http_async_client = get_http_clients()
 	return ChatOpenAI(
 		model="arcee-ai/trinity-large-preview:free",
 		temperature=0.9,
-		base_url="https://openrouter.ai/api/v1",
+		base_url=LLM_BASE_URL,
 		default_headers={
 			"HTTP-Referer": "http://localhost:8000",
 			"X-Title": "RAG with Langchain",
 		},
+		http_client=http_client,
+		http_async_client=http_async_client,
+		# The OpenAI client passes its own timeout on every request, overriding the httpx client's
+		timeout=http_settings()["timeout"],
+		max_retries=int(os.getenv("LLM_MAX_RETRIES", "2")),
 	)
 
+@lru_cache(maxsize=1)
 def get_chain():
 	model = get_model()
 	return create_stuff_documents_chain(model, prompt)
 
 
-def format_chat_history(limit: int = 20, only_complete: bool = False) -> str:
-	if not chat_history_list:
-		return ""
-	# Filter to only completed Q/A pairs if requested (for scoring)
-	items = chat_history_list if not only_complete else [
-		item for item in chat_history_list if item.get('answer')
-	]
-	window = items[-limit:]
-	return "\n\n".join(
-		f"Question: {item.get('question', '').strip()}\nAnswer: {item.get('answer', '').strip() or '(no answer)'}"
-		for item in window
-	)
+async def warm_up():
+	"""Build the shared clients and chain once, and optionally open a keep-alive connection."""
+	get_embeddings()
+	get_embedding_cache()
+	get_index_cache()
+	get_chain()
+	if os.getenv("LLM_WARMUP_PING", "0") == "1":
+		_, http_async_client = get_http_clients()
+		try:
+			await http_async_client.get(f"{LLM_BASE_URL}/models")
+		except httpx.HTTPError as exc:
+			print(f"LLM warm-up ping failed: {exc}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+	await warm_up()
+	yield
+	http_client, http_async_client = get_http_clients()
+	http_client.close()
+	await http_async_client.aclose()
+
+
+background_tasks = set()
+
+
+async def summarize_history(previous_summary: str, transcript: str) -> str:
+	messages = summary_prompt.format_messages(previous_summary=previous_summary or "(none)", transcript=transcript)
+	response = await get_model().ainvoke(messages)
+	return getattr(response, "content", response).strip()
+
+
+async def compact_history(history) -> None:
+	try:
+		await history.compact(summarize_history)
+	except Exception as exc:
+		# Summaries are an optimisation; keep the verbatim turns if the model call fails
+		print(f"History compaction failed: {exc}")
+
+
+app = FastAPI(title="AI Interview Prep Backend", lifespan=lifespan)
+
+app.add_middleware(
+	CORSMiddleware,
+	allow_origins=["*"],
+	allow_credentials=True,
+	allow_methods=["*"],
+	allow_headers=["*"],
+)
+
+
+sessions = SessionStore(
+	embeddings_factory=get_embeddings,
+	history_options={
+		"max_turns": int(os.getenv("HISTORY_MAX_TURNS", "20")),
+		"summarize": os.getenv("HISTORY_SUMMARY", "0") == "1",
+		"keep_recent": int(os.getenv("HISTORY_KEEP_RECENT", "4")),
+	},
+	max_sessions=int(os.getenv("SESSION_MAX", "200")),
+	ttl_seconds=float(os.getenv("SESSION_TTL_SECONDS", str(6 * 3600))),
+	idle_seconds=float(os.getenv("SESSION_IDLE_SECONDS", str(15 * 60))),
+	spill_dir=os.getenv("SESSION_SPILL_DIR") or None,
+)
+
+
+async def require_session(session_id):
+	"""The caller's session, pinned in memory until sessions.release(session).
+
+	Lookups run in a thread: a spilled session is reloaded from disk, and the
+	lookup may spill others.
+	"""
+	session = await asyncio.to_thread(sessions.get, session_id, True)
+	if session is None or not session.ready:
+		if session is not None:
+			sessions.release(session)
+		raise HTTPException(status_code=400, detail="Run /analyze first to upload CV and JD")
+	return session
 
 
+def release_once(session):
+	"""Release callable for a pinned session; calling it more than once is harmless."""
+	released = False
 
-cv_store = None
-jd_store = None
-chat_history_list = []  
+	def release():
+		nonlocal released
+		if not released:
+			released = True
+			sessions.release(session)
+
+	return release
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+	return {
+		"embeddings": get_embedding_cache().stats(),
+		"indexes": get_index_cache().stats(),
+		"scores": score_memo.stats(),
+		"sessions": await asyncio.to_thread(sessions.stats),
+	}
+
+
+@app.get("/stats/stages")
+async def stage_timings():
+	"""Per-stage latency breakdown: parse, split, embed, index, retrieve, generate, score."""
+	return Timings.stage_stats()
 
 
 @app.post("/reset")
-async def reset_session():
-	"""Clear all session state - CV, JD, and chat history."""
-	global cv_store, jd_store, chat_history_list
-	cv_store = None
-	jd_store = None
-	chat_history_list = []
+async def reset_session(x_session_id: str | None = Header(default=None)):
+	"""Clear one session's state - CV, JD, and chat history."""
+	await asyncio.to_thread(sessions.drop, x_session_id)
 	return {"message": "Session reset"}
 
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Parsing, splitting, embedding and indexing run here so they never block the event loop
+analyze_executor = ThreadPoolExecutor(
+	max_workers=int(os.getenv("ANALYZE_WORKERS", "8")),
+	thread_name_prefix="analyze",
+)
+
+
+async def run_blocking(func, *args):
+	loop = asyncio.get_running_loop()
+	return await loop.run_in_executor(analyze_executor, func, *args)
+
+
+async def save_upload(upload: UploadFile):
+	"""Stream the upload to a uniquely named temp file without reading it all into memory.
+
+	Returns the file path and the sha256 of its contents.
+	"""
+	upload_dir = os.path.join(tempfile.gettempdir(), "ai_interview_uploads")
+	os.makedirs(upload_dir, exist_ok=True)
+	suffix = os.path.splitext(upload.filename or "")[1]
+	fd, file_path = tempfile.mkstemp(suffix=suffix, dir=upload_dir)
+
+	digest = hashlib.sha256()
+	with os.fdopen(fd, "wb") as f:
+		while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+			digest.update(chunk)
+			await run_blocking(f.write, chunk)
+	return file_path, digest.hexdigest()
+
+
+def cached_store(content_hash: str, source: str, build):
+	"""Load the index for known content from disk, or build it and persist it for next time.
+
+	Returns the chunk texts, embedding dimension and FAISS store.
+	"""
+	index_cache = get_index_cache()
+	key = index_key(content_hash, source)
+	store = index_cache.load(key, get_embeddings())
+	if store is not None:
+		return store_chunks(store), store.index.d, store
+
+	chunks, vectors = build()
+	store = build_store(chunks, vectors, source=source)
+	index_cache.save(key, store)
+	return chunks, len(vectors[0]) if vectors else 0, store
+
+
+def process_cv(file_path: str, content_type: str, content_hash: str):
+	return cached_store(
+		content_hash,
+		"CV",
+		lambda: split_and_embed(load_text(file_path, content_type)),
+	)
+
+
+def process_jd(job_description: str):
+	return cached_store(
+		chunk_hash(job_description),
+		"JD",
+		lambda: split_and_embed(job_description),
+	)
+
+
 @app.post("/analyze")
 async def analyze_profile(
 	resume: UploadFile = File(...),
 	job_description: str = Form(...),
+	x_session_id: str | None = Header(default=None),
 ):
-	global cv_store, jd_store, chat_history_list
-
 	# Basic validation of file type
 	allowed_types = {
 		"application/pdf",
@@ -174,28 +463,25 @@ async def analyze_profile(
 		raise HTTPException(status_code=400, detail="Unsupported file type. Upload PDF or DOCX.")
 
 
-	upload_dir = os.path.join(tempfile.gettempdir(), "ai_interview_uploads")
-	os.makedirs(upload_dir, exist_ok=True)
-	file_path = os.path.join(upload_dir, resume.filename)
-
-	with open(file_path, "wb") as f:
-		content = await resume.read()
-		f.write(content)
-
-	text = load_text(file_path, resume.content_type)
-	chunks, vectors = split_and_embed(text)
-
-	jd_chunks, jd_vectors = split_and_embed(job_description)
+	file_path, content_hash = await save_upload(resume)
+	try:
+		(chunks, dimension, cv_store), (jd_chunks, _, jd_store) = await asyncio.gather(
+			run_blocking(process_cv, file_path, resume.content_type, content_hash),
+			run_blocking(process_jd, job_description),
+		)
+	finally:
+		os.remove(file_path)
 
-	cv_store = build_store(chunks, vectors, source="CV")
-	jd_store = build_store(jd_chunks, jd_vectors, source="JD")
-	chat_history_list = []  
+	session = await asyncio.to_thread(
+		lambda: sessions.create(x_session_id, cv_store=cv_store, jd_store=jd_store)
+	)
 
 	return {
 		"message": "Processed",
+		"session_id": session.session_id,
 		"filename": resume.filename,
 		"chunks": len(chunks),
-		"embedding_dimension": len(vectors[0]) if vectors else 0,
+		"embedding_dimension": dimension,
 		"sample_chunk": chunks[0][:300],
 		"job_description_chunks": len(jd_chunks),
 		"job_description_sample": jd_chunks[0][:200] if jd_chunks else "",
@@ -207,74 +493,211 @@ class ChatRequest(BaseModel):
 	user_answer: str = ""
 
 
-@app.post("/chat/next")
-async def chat_next(req: ChatRequest):
-	global cv_store, jd_store, chat_history_list
-
-	if cv_store is None or jd_store is None:
-		raise HTTPException(status_code=400, detail="Run /analyze first to upload CV and JD")
+RETRIEVAL_HISTORY_QUERIES = int(os.getenv("RETRIEVAL_HISTORY_QUERIES", "0"))
 
-	if chat_history_list and req.user_answer:
-		chat_history_list[-1]["answer"] = req.user_answer
 
-	query = req.user_answer or "generate interview question"
-	cv_docs = cv_store.similarity_search(query, k=3)
-	jd_docs = jd_store.similarity_search(query, k=2)
-	context_docs = cv_docs + jd_docs
+async def prepare_turn(session, user_answer: str) -> dict:
+	"""Record the user's answer and build the chain inputs for the next question."""
+	history = session.history
+	history.record_answer(user_answer)
 
-	history_str = ""
-	if chat_history_list:
-		history_str = "\n".join(
-			f"Q: {item['question']}\nA: {item['answer']}" for item in chat_history_list[-3:]
+	# The current answer plus the last few answers, embedded once and searched against both indexes
+	queries = [user_answer or DEFAULT_QUERY]
+	if RETRIEVAL_HISTORY_QUERIES:
+		queries += [item["answer"] for item in history.recent(RETRIEVAL_HISTORY_QUERIES + 1)[:-1] if item["answer"]]
+	with stage("retrieve"):
+		context_docs = await asyncio.to_thread(
+			retrieve_context, session, queries, embed_queries_remote, k_cv=3, k_jd=2,
 		)
 
-	chain = get_chain()
-	result = chain.invoke({
+	return {
 		"context": context_docs,
-		"chat_history": history_str,
-		"user_answer": req.user_answer,
-	})
+		"chat_history": history.render_recent(3),
+		"user_answer": user_answer,
+	}
+
 
+def finish_turn(session, result: str) -> dict:
 	# Parse result: assume it contains critique (if any) + next question
 	# For simplicity, store the entire result as the next question
-	chat_history_list.append({"question": result, "answer": ""})
-
+	session.history.add_question(result)
+	if session.history.needs_compaction():
+		# Keep the session in memory until the summary lands on its history
+		sessions.pin(session)
+		task = asyncio.get_running_loop().create_task(compact_history(session.history))
+		# Hold a reference so the task is not garbage collected mid-flight
+		background_tasks.add(task)
+		task.add_done_callback(background_tasks.discard)
+		task.add_done_callback(lambda _: sessions.release(session))
 	return {
 		"question": result,
-		"history_length": len(chat_history_list),
+		"history_length": len(session.history),
 	}
 
 
-@app.post("/chat/score")
-async def chat_score():
+def ndjson(event: dict) -> str:
+	return json.dumps(event) + "\n"
+
+
+def stream_events(tokens, on_complete, stage_name: str = "generate", release=None):
+	"""Wrap an async token iterator as NDJSON token events followed by a final done event.
+
+	``on_complete(text)`` builds the done event and may be a coroutine function.
+	``release`` (from release_once) runs when the stream ends, however it ends.
+	"""
+
+	async def generate():
+		parts = []
+		start = time.perf_counter()
+		try:
+			async for token in tokens:
+				if token:
+					if not parts:
+						Timings.record(f"{stage_name}_first_token", time.perf_counter() - start)
+					parts.append(token)
+					yield ndjson({"type": "token", "text": token})
+			done = on_complete("".join(parts))
+			if inspect.isawaitable(done):
+				done = await done
+			Timings.record(stage_name, time.perf_counter() - start)
+			yield ndjson({"type": "done", **done})
+		except HTTPException as exc:
+			yield ndjson({"type": "error", "detail": exc.detail})
+		except Exception as exc:
+			yield ndjson({"type": "error", "detail": str(exc)})
+		finally:
+			if release:
+				release()
+
+	return StreamingResponse(
+		generate(),
+		media_type="application/x-ndjson",
+		headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+		# Also covers a client that disconnects before the body starts
+		background=BackgroundTask(release) if release else None,
+	)
+
+
+@app.post("/chat/next")
+async def chat_next(req: ChatRequest, x_session_id: str | None = Header(default=None)):
+	session = await require_session(x_session_id)
+	try:
+		inputs = await prepare_turn(session, req.user_answer)
+		with stage("generate"):
+			result = await get_chain().ainvoke(inputs)
+		return finish_turn(session, result)
+	finally:
+		sessions.release(session)
+
+
+@app.post("/chat/next/stream")
+async def chat_next_stream(req: ChatRequest, x_session_id: str | None = Header(default=None)):
+	"""Same as /chat/next, but forwards tokens as NDJSON lines as soon as the model emits them."""
+	session = await require_session(x_session_id)
+	release = release_once(session)
+	try:
+		inputs = await prepare_turn(session, req.user_answer)
+	except BaseException:
+		release()
+		raise
+	return stream_events(
+		get_chain().astream(inputs),
+		lambda result: finish_turn(session, result),
+		release=release,
+	)
+
+
+def prepare_score(session):
+	"""Returns the transcript cache key and the scoring prompt messages."""
 	# Check if we have at least one completed Q/A pair (some entries may have empty answers)
-	completed_pairs = [item for item in chat_history_list if item.get("answer")]
-	if not completed_pairs:
+	if not session.history.completed:
 		raise HTTPException(status_code=400, detail="Complete at least one Q/A before scoring")
 
-	model = get_model()
-	history_str = format_chat_history(only_complete=True)  # Only score completed Q/A pairs
-	messages = score_prompt.format_messages(chat_history=history_str)
-	response = model.invoke(messages)
-	content = getattr(response, "content", response)
+	# Only score completed Q/A pairs, plus the rolling summary of older turns if enabled
+	history_str = session.history.render_transcript(only_complete=True)
+	key = transcript_key(get_model().model_name, history_str)
+	return key, score_prompt.format_messages(chat_history=history_str)
+
+
+@lru_cache(maxsize=1)
+def get_score_model():
+	return get_model().with_structured_output(InterviewScore)
+
+
+score_memo = ScoreMemo(max_entries=int(os.getenv("SCORE_MEMO_MAX_ENTRIES", "1024")))
+
 
+def parse_score(content: str) -> dict:
 	try:
-		payload = json.loads(content)
-	except json.JSONDecodeError as exc:
-		raise HTTPException(status_code=500, detail=f"Scoring model returned invalid JSON: {content}") from exc
+		return normalize_score(extract_json(content))
+	except ScoreParseError as exc:
+		raise HTTPException(status_code=502, detail=str(exc)) from exc
 
-	score = payload.get("score")
-	feedback = payload.get("feedback", "")
-	if score is None:
-		raise HTTPException(status_code=500, detail="Score missing from model response")
 
+async def score_messages(messages) -> dict:
+	"""Structured output first; if the model can't do that, one plain call parsed leniently."""
 	try:
-		score_value = max(1, min(10, round(float(score))))
-	except (TypeError, ValueError) as exc:
-		raise HTTPException(status_code=500, detail="Score must be numeric") from exc
+		return normalize_score(await get_score_model().ainvoke(messages))
+	except Exception as exc:
+		print(f"Structured scoring failed, retrying with plain output: {exc}")
+	response = await get_model().ainvoke(messages)
+	return parse_score(getattr(response, "content", response))
 
-	return {
-		"score": score_value,
-		"feedback": feedback,
-		"entries": len(chat_history_list),
-	}
+
+def score_response(session, result: dict) -> dict:
+	return {**result, "entries": len(session.history)}
+
+
+@app.post("/chat/score")
+async def chat_score(x_session_id: str | None = Header(default=None)):
+	session = await require_session(x_session_id)
+	try:
+		key, messages = prepare_score(session)
+		result = score_memo.get(key)
+		if result is None:
+			with stage("score"):
+				result = await score_messages(messages)
+			score_memo.put(key, result)
+		return score_response(session, result)
+	finally:
+		sessions.release(session)
+
+
+@app.post("/chat/score/stream")
+async def chat_score_stream(x_session_id: str | None = Header(default=None)):
+	"""Streams the evaluator's raw output as progress, then the score in the final done event.
+
+	The score comes from the streamed text when it parses; otherwise from
+	score_messages(), the same structured-output-then-retry path as /chat/score.
+	"""
+	session = await require_session(x_session_id)
+	release = release_once(session)
+	try:
+		key, messages = prepare_score(session)
+	except BaseException:
+		release()
+		raise
+	cached = score_memo.get(key)
+
+	async def tokens():
+		if cached is not None:
+			return
+		try:
+			async for chunk in get_model().astream(messages):
+				yield getattr(chunk, "content", chunk)
+		except Exception as exc:
+			# The tokens are only progress; on_complete still produces the score
+			print(f"Streaming score failed, falling back: {exc}")
+
+	async def on_complete(content: str) -> dict:
+		result = cached
+		if result is None:
+			try:
+				result = normalize_score(extract_json(content))
+			except ScoreParseError as exc:
+				print(f"Streamed score did not parse, scoring again: {exc}")
+				result = await score_messages(messages)
+			score_memo.put(key, result)
+		return score_response(session, result)
+
+	return stream_events(tokens(), on_complete, stage_name="score", release=release)
@@ -0,0 +1,56 @@
+from collections import OrderedDict
+from typing import Callable, List, Sequence
+
+from langchain_core.documents import Document
+
+
+DEFAULT_QUERY = "generate interview question"
+
+
+def embed_queries(
+	queries: Sequence[str],
+	memo: "OrderedDict[str, List[float]]",
+	embed_batch: Callable[[List[str]], List[List[float]]],
+	max_memo: int = 256,
+) -> List[List[float]]:
+	"""Embed each distinct query once, reusing vectors already memoized for this session."""
+	missing = [q for q in dict.fromkeys(queries) if q not in memo]
+	if missing:
+		for query, vector in zip(missing, embed_batch(missing)):
+			memo[query] = vector
+	vectors = []
+	for query in queries:
+		memo.move_to_end(query)
+		vectors.append(memo[query])
+	while len(memo) > max_memo:
+		memo.popitem(last=False)
+	return vectors
+
+
+def search_store(store, vectors: Sequence[List[float]], k: int) -> List[Document]:
+	"""Search one FAISS index with several query vectors and keep the best hit per chunk."""
+	best = {}
+	for vector in vectors:
+		for doc, distance in store.similarity_search_with_score_by_vector(vector, k=k):
+			key = (doc.metadata.get("source"), doc.metadata.get("index"), doc.page_content)
+			if key not in best or distance < best[key][1]:
+				best[key] = (doc, distance)
+	ranked = sorted(best.values(), key=lambda item: item[1])
+	return [doc for doc, _ in ranked[:k]]
+
+
+def retrieve_context(
+	session,
+	queries: Sequence[str],
+	embed_batch: Callable[[List[str]], List[List[float]]],
+	k_cv: int = 3,
+	k_jd: int = 2,
+) -> List[Document]:
+	"""Embed the queries once and search both the CV and JD indexes with the same vectors.
+
+	Returns merged, de-duplicated context: the top ``k_cv`` CV chunks followed by
+	the top ``k_jd`` JD chunks across all queries.
+	"""
+	queries = [q for q in queries if q] or [DEFAULT_QUERY]
+	vectors = embed_queries(queries, session.query_vectors, embed_batch)
+	return search_store(session.cv_store, vectors, k_cv) + search_store(session.jd_store, vectors, k_jd)
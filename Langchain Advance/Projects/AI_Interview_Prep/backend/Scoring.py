@@ -0,0 +1,86 @@
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+from pydantic import BaseModel, Field
+
+
+class InterviewScore(BaseModel):
+	score: float = Field(description="Integer 1-10 reflecting how strong the candidate is")
+	feedback: str = Field(default="", description="Concise (<=60 words) guidance on improvement")
+
+
+class ScoreParseError(ValueError):
+	pass
+
+
+FENCE_PATTERN = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+
+
+def extract_json(text: str) -> dict:
+	"""Pull the first JSON object out of model output, tolerating prose and code fences."""
+	candidates = [m.group(1) for m in FENCE_PATTERN.finditer(text)] + [text]
+	decoder = json.JSONDecoder()
+	for candidate in candidates:
+		for start, char in enumerate(candidate):
+			if char != "{":
+				continue
+			try:
+				payload, _ = decoder.raw_decode(candidate[start:])
+			except json.JSONDecodeError:
+				continue
+			if isinstance(payload, dict):
+				return payload
+	raise ScoreParseError(f"No JSON object in model response: {text[:200]}")
+
+
+def normalize_score(payload: Any) -> dict:
+	"""Validate a structured or parsed payload and clamp the score to 1-10."""
+	if isinstance(payload, InterviewScore):
+		payload = payload.model_dump()
+	if not isinstance(payload, dict) or payload.get("score") is None:
+		raise ScoreParseError("Score missing from model response")
+	try:
+		score_value = max(1, min(10, round(float(payload["score"]))))
+	except (TypeError, ValueError) as exc:
+		raise ScoreParseError("Score must be numeric") from exc
+	return {"score": score_value, "feedback": str(payload.get("feedback") or "")}
+
+
+def transcript_key(model_name: str, transcript: str) -> str:
+	return hashlib.sha256(f"{model_name}\0{transcript}".encode("utf-8")).hexdigest()
+
+
+class ScoreMemo:
+	"""Bounded LRU of score results keyed by transcript hash."""
+
+	def __init__(self, max_entries: int = 1024):
+		self.max_entries = max_entries
+		self.hits = 0
+		self.misses = 0
+		self._entries: "OrderedDict[str, dict]" = OrderedDict()
+		self._lock = threading.Lock()
+
+	def get(self, key: str) -> Optional[dict]:
+		with self._lock:
+			result = self._entries.get(key)
+			if result is None:
+				self.misses += 1
+				return None
+			self._entries.move_to_end(key)
+			self.hits += 1
+			return dict(result)
+
+	def put(self, key: str, result: dict) -> None:
+		with self._lock:
+			self._entries[key] = dict(result)
+			self._entries.move_to_end(key)
+			while len(self._entries) > self.max_entries:
+				self._entries.popitem(last=False)
+
+	def stats(self) -> dict:
+		with self._lock:
+			return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
@@ -0,0 +1,286 @@
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_community.vectorstores import FAISS
+
+from History import ChatHistory
+
+
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def new_session_id() -> str:
+	return uuid.uuid4().hex
+
+
+def is_valid_session_id(session_id: Optional[str]) -> bool:
+	return bool(session_id) and bool(SESSION_ID_PATTERN.match(session_id))
+
+
+@dataclass
+class Session:
+	session_id: str
+	cv_store: Any = None
+	jd_store: Any = None
+	history: ChatHistory = field(default_factory=ChatHistory)
+	last_access: float = field(default_factory=time.time)
+	# Memoized query embeddings; cheap to rebuild, so never spilled to disk
+	query_vectors: "OrderedDict[str, List[float]]" = field(default_factory=OrderedDict)
+	# Requests (and background tasks) still using this session; pinned sessions are never evicted
+	pins: int = 0
+
+	@property
+	def ready(self) -> bool:
+		return self.cv_store is not None and self.jd_store is not None
+
+
+class SessionStore:
+	"""In-memory sessions with TTL + LRU eviction and optional spill-to-disk.
+
+	Sessions idle longer than ``idle_seconds`` (or pushed out by ``max_sessions``)
+	are written to ``spill_dir`` when it is set, and reloaded on next access.
+	Sessions untouched for ``ttl_seconds`` are discarded from memory and disk.
+	Pinned sessions (see ``get(pin=True)``) stay in memory until released.
+
+	Spilling and reloading do file I/O: call these methods from a worker thread,
+	not the event loop. Disk work happens outside ``_lock`` under its own lock,
+	so it never holds up lookups of other sessions.
+	"""
+
+	def __init__(
+		self,
+		embeddings_factory: Callable[[], Any],
+		max_sessions: int = 200,
+		ttl_seconds: float = 6 * 3600,
+		idle_seconds: float = 15 * 60,
+		spill_dir: Optional[str] = None,
+		history_options: Optional[dict] = None,
+	):
+		self.embeddings_factory = embeddings_factory
+		self.max_sessions = max_sessions
+		self.ttl_seconds = ttl_seconds
+		self.idle_seconds = idle_seconds
+		self.spill_dir = spill_dir
+		self.history_options = history_options or {}
+		self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+		# Evicted sessions whose files are still being written; lookups take them from here
+		self._spilling: Dict[str, Session] = {}
+		self._lock = threading.RLock()
+		self._io_lock = threading.Lock()
+		if spill_dir:
+			os.makedirs(spill_dir, exist_ok=True)
+
+	def create(self, session_id: Optional[str] = None, **fields) -> Session:
+		session_id = session_id if is_valid_session_id(session_id) else new_session_id()
+		session = Session(session_id=session_id, history=ChatHistory(**self.history_options), **fields)
+		with self._lock:
+			self._sessions[session_id] = session
+			self._sessions.move_to_end(session_id)
+			self._spilling.pop(session_id, None)
+			spill, remove = self._evict()
+		self._write(spill, remove + [session_id])
+		return session
+
+	def get(self, session_id: Optional[str], pin: bool = False) -> Optional[Session]:
+		"""The session, reloaded from disk if it was spilled; None if unknown or expired.
+
+		With ``pin=True`` the session is held in memory until ``release(session)``.
+		"""
+		if not is_valid_session_id(session_id):
+			return None
+		with self._lock:
+			session = self._take(session_id)
+			result = self._touch(session, pin) if session is not None else None
+		if result is None:
+			result = self._load(session_id, pin)
+			if result is None:
+				return None
+		session, spill, remove = result
+		self._write(spill, remove)
+		return session
+
+	def pin(self, session: Session) -> None:
+		with self._lock:
+			session.pins += 1
+
+	def release(self, session: Session) -> None:
+		"""Undo one ``pin()`` or ``get(pin=True)``."""
+		with self._lock:
+			session.pins = max(0, session.pins - 1)
+			session.last_access = time.time()
+
+	def drop(self, session_id: Optional[str]) -> bool:
+		if not is_valid_session_id(session_id):
+			return False
+		with self._lock:
+			existed = self._sessions.pop(session_id, None) is not None
+			existed = self._spilling.pop(session_id, None) is not None or existed
+		with self._io_lock:
+			return self._remove_spilled(session_id) or existed
+
+	def __len__(self) -> int:
+		return len(self._sessions)
+
+	def stats(self) -> dict:
+		with self._lock:
+			in_memory = set(self._sessions)
+			pinned = sum(1 for session in self._sessions.values() if session.pins)
+		spilled = 0
+		if self.spill_dir and os.path.isdir(self.spill_dir):
+			spilled = sum(1 for name in os.listdir(self.spill_dir) if name not in in_memory)
+		return {
+			"in_memory": len(in_memory),
+			"pinned": pinned,
+			"spilled": spilled,
+			"max_sessions": self.max_sessions,
+		}
+
+	# Eviction ------------------------------------------------------------
+
+	def _take(self, session_id: str) -> Optional[Session]:
+		"""In-memory lookup (caller holds _lock); revives a session that is mid-spill."""
+		session = self._sessions.get(session_id)
+		if session is None:
+			session = self._spilling.pop(session_id, None)
+			if session is not None:
+				self._sessions[session_id] = session
+		return session
+
+	def _touch(self, session: Session, pin: bool):
+		"""Mark an in-memory session used, or expire it (caller holds _lock).
+
+		Returns (session or None if expired, sessions to spill, ids to delete on disk).
+		"""
+		now = time.time()
+		expired = []
+		if now - session.last_access > self.ttl_seconds and not session.pins:
+			self._sessions.pop(session.session_id, None)
+			expired.append(session.session_id)
+			session = None
+		else:
+			session.last_access = now
+			session.pins += int(pin)
+			self._sessions.move_to_end(session.session_id)
+		spill, remove = self._evict()
+		return session, spill, remove + expired
+
+	def _evict(self):
+		"""Pick sessions to evict (caller holds _lock). Returns (sessions to spill, ids to delete on disk)."""
+		now = time.time()
+		spill, remove = [], []
+		for session_id, session in list(self._sessions.items()):
+			if session.pins:
+				continue
+			idle = now - session.last_access
+			if idle > self.ttl_seconds:
+				self._sessions.pop(session_id)
+				remove.append(session_id)
+			elif idle > self.idle_seconds and self.spill_dir:
+				spill.append(self._sessions.pop(session_id))
+
+		# Oldest first, skipping pinned ones; if every session is pinned the store runs over max_sessions
+		overflow = len(self._sessions) - self.max_sessions
+		for session_id, session in list(self._sessions.items()):
+			if overflow <= 0:
+				break
+			if session.pins:
+				continue
+			spill.append(self._sessions.pop(session_id))
+			overflow -= 1
+
+		if self.spill_dir:
+			for session in spill:
+				self._spilling[session.session_id] = session
+		else:
+			spill = []
+		return spill, remove
+
+	def _write(self, spill: List[Session], remove: List[str]) -> None:
+		"""Disk side of an eviction, done after _lock is released."""
+		if not self.spill_dir or not (spill or remove):
+			return
+		with self._io_lock:
+			for session_id in remove:
+				self._remove_spilled(session_id)
+			for session in spill:
+				self._spill(session)
+				with self._lock:
+					# Revived or dropped while being written: the copy on disk is stale
+					stale = self._spilling.get(session.session_id) is not session
+					if not stale:
+						del self._spilling[session.session_id]
+				if stale:
+					self._remove_spilled(session.session_id)
+
+	# Spill to disk -------------------------------------------------------
+
+	def _session_dir(self, session_id: str) -> str:
+		return os.path.join(self.spill_dir, session_id)
+
+	def _spill(self, session: Session) -> None:
+		path = self._session_dir(session.session_id)
+		os.makedirs(path, exist_ok=True)
+		if session.cv_store is not None:
+			session.cv_store.save_local(os.path.join(path, "cv"))
+		if session.jd_store is not None:
+			session.jd_store.save_local(os.path.join(path, "jd"))
+		with open(os.path.join(path, "session.json"), "w", encoding="utf-8") as f:
+			json.dump({"history": session.history.to_dict(), "last_access": session.last_access}, f)
+
+	def _load(self, session_id: str, pin: bool):
+		"""Reload a spilled session into memory (or use the copy another thread already loaded) and touch it."""
+		if not self.spill_dir:
+			return None
+		with self._io_lock:
+			with self._lock:
+				session = self._take(session_id)
+				if session is not None:
+					return self._touch(session, pin)
+			session = self._load_spilled(session_id)
+			if session is None:
+				return None
+			with self._lock:
+				self._sessions[session_id] = session
+				result = self._touch(session, pin)
+			self._remove_spilled(session_id)
+			return result
+
+	def _load_spilled(self, session_id: str) -> Optional[Session]:
+		path = self._session_dir(session_id)
+		meta_path = os.path.join(path, "session.json")
+		if not os.path.exists(meta_path):
+			return None
+		with open(meta_path, encoding="utf-8") as f:
+			meta = json.load(f)
+
+		def load(name):
+			folder = os.path.join(path, name)
+			if not os.path.isdir(folder):
+				return None
+			# These files are written by this process only, never user supplied
+			return FAISS.load_local(folder, self.embeddings_factory(), allow_dangerous_deserialization=True)
+
+		return Session(
+			session_id=session_id,
+			cv_store=load("cv"),
+			jd_store=load("jd"),
+			history=ChatHistory.from_dict(meta.get("history", {}), **self.history_options),
+			last_access=meta.get("last_access", time.time()),
+		)
+
+	def _remove_spilled(self, session_id: str) -> bool:
+		if not self.spill_dir:
+			return False
+		path = self._session_dir(session_id)
+		if os.path.isdir(path):
+			shutil.rmtree(path, ignore_errors=True)
+			return True
+		return False
@@ -0,0 +1,54 @@
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+
+_samples = defaultdict(lambda: deque(maxlen=10000))
+_lock = threading.Lock()
+
+
+def record(name: str, seconds: float) -> None:
+	with _lock:
+		_samples[name].append(seconds)
+
+
+@contextmanager
+def stage(name: str):
+	"""Time a pipeline stage (parse, split, embed, index, retrieve, generate, ...)."""
+	start = time.perf_counter()
+	try:
+		yield
+	finally:
+		record(name, time.perf_counter() - start)
+
+
+def percentile(values, pct: float) -> float:
+	if not values:
+		return 0.0
+	ordered = sorted(values)
+	# Nearest-rank percentile
+	rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+	return ordered[rank]
+
+
+def stage_stats() -> dict:
+	"""Per-stage count, mean and p50/p95/p99 in milliseconds."""
+	with _lock:
+		snapshot = {name: list(values) for name, values in _samples.items()}
+	return {
+		name: {
+			"count": len(values),
+			"mean_ms": round(1000 * sum(values) / len(values), 2) if values else 0.0,
+			"p50_ms": round(1000 * percentile(values, 50), 2),
+			"p95_ms": round(1000 * percentile(values, 95), 2),
+			"p99_ms": round(1000 * percentile(values, 99), 2),
+		}
+		for name, values in snapshot.items()
+	}
+
+
+def reset() -> None:
+	with _lock:
+		_samples.clear()
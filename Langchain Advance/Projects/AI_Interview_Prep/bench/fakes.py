@@ -0,0 +1,87 @@
+import asyncio
+import time
+from typing import Any, List, Optional
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class FakeEmbeddings(DeterministicFakeEmbedding):
+	"""Hash-seeded vectors with an optional per-call delay standing in for the Cohere round trip."""
+
+	latency: float = 0.0
+
+	def embed_documents(self, texts: List[str]) -> List[List[float]]:
+		if self.latency:
+			time.sleep(self.latency)
+		return super().embed_documents(texts)
+
+	def embed_query(self, text: str) -> List[float]:
+		if self.latency:
+			time.sleep(self.latency)
+		return super().embed_query(text)
+
+	def embed(self, texts: List[str], input_type: Optional[str] = None) -> List[List[float]]:
+		# Mirrors CohereEmbeddings.embed, which the backend uses for batched queries
+		if self.latency:
+			time.sleep(self.latency)
+		return [self._get_embedding(seed=self._get_seed(t)) for t in texts]
+
+
+QUESTION = (
+	"Your answer covers the main idea but skips the trade-offs. "
+	"Next question: walk me through a project where you had to optimise a slow data pipeline."
+)
+SCORE = '{"score": 7, "feedback": "Solid fundamentals; give more concrete metrics and trade-offs."}'
+SUMMARY = "Candidate discussed pipeline optimisation and API design; answers were brief on trade-offs."
+
+
+class FakeChatModel(BaseChatModel):
+	"""Deterministic chat model with configurable time to first token and per-token delay.
+
+	Replies with a fixed critique + question, or a JSON score / summary when the
+	prompt comes from the scoring or summary templates. It has no tool calling,
+	so the backend's structured-output scoring falls back to its plain-JSON path.
+	"""
+
+	model_name: str = "fake-chat"
+	first_token_latency: float = 0.0
+	token_latency: float = 0.0
+
+	@property
+	def _llm_type(self) -> str:
+		return "fake-chat"
+
+	def _reply(self, messages) -> str:
+		text = " ".join(str(m.content) for m in messages)
+		if "interview evaluator" in text:
+			return SCORE
+		if "running summary" in text:
+			return SUMMARY
+		return QUESTION
+
+	def _tokens(self, reply: str) -> List[str]:
+		words = reply.split(" ")
+		return [w if i == len(words) - 1 else w + " " for i, w in enumerate(words)]
+
+	def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+		reply = self._reply(messages)
+		time.sleep(self.first_token_latency + self.token_latency * len(self._tokens(reply)))
+		return ChatResult(generations=[ChatGeneration(message=AIMessage(content=reply))])
+
+	async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+		reply = self._reply(messages)
+		await asyncio.sleep(self.first_token_latency + self.token_latency * len(self._tokens(reply)))
+		return ChatResult(generations=[ChatGeneration(message=AIMessage(content=reply))])
+
+	async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+		await asyncio.sleep(self.first_token_latency)
+		for token in self._tokens(self._reply(messages)):
+			if self.token_latency:
+				await asyncio.sleep(self.token_latency)
+			chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+			if run_manager:
+				await run_manager.on_llm_new_token(token, chunk=chunk)
+			yield chunk
@@ -0,0 +1,115 @@
+import io
+import random
+import textwrap
+import zipfile
+from xml.sax.saxutils import escape
+
+
+SKILLS = [
+	"Python", "FastAPI", "PostgreSQL", "Docker", "Kubernetes", "LangChain", "FAISS",
+	"PyTorch", "Redis", "Kafka", "AWS", "CI/CD", "REST APIs", "pandas", "Airflow",
+]
+
+JOB_DESCRIPTION = textwrap.dedent("""
+	We are hiring a Machine Learning Engineer to build retrieval-augmented generation services.
+	Responsibilities: design FastAPI backends, build embedding pipelines with FAISS, deploy with
+	Docker and Kubernetes, monitor latency and cost, and collaborate with product teams.
+	Requirements: 3+ years of Python, experience with LangChain or similar frameworks, vector
+	databases, SQL, cloud deployment on AWS, and strong communication skills.
+""").strip()
+
+
+def resume_text(seed: int = 0, paragraphs: int = 12) -> str:
+	"""Deterministic CV-like text; different seeds give different documents (and cache keys)."""
+	rng = random.Random(seed)
+	lines = [f"Candidate {seed}", "Machine Learning Engineer", ""]
+	for i in range(paragraphs):
+		skills = ", ".join(rng.sample(SKILLS, 4))
+		lines.append(
+			f"Project {i + 1}: Built a service using {skills}. Reduced p95 latency by "
+			f"{rng.randint(10, 70)}% and cut infrastructure cost by {rng.randint(5, 40)}% "
+			f"while serving {rng.randint(1, 50)}k requests per day for {rng.randint(2, 30)} internal teams."
+		)
+	return "\n".join(lines)
+
+
+def make_pdf(text: str) -> bytes:
+	"""Minimal single-font PDF with a real text layer, readable by pypdf."""
+	lines = []
+	for paragraph in text.splitlines():
+		lines.extend(textwrap.wrap(paragraph, 90) or [""])
+
+	pages = [lines[i:i + 50] for i in range(0, len(lines), 50)] or [[]]
+	objects = []
+
+	def add(body: bytes) -> int:
+		objects.append(body)
+		return len(objects)
+
+	font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+	pages_id = add(b"")  # filled in once the page ids are known
+	page_ids = []
+	for page_lines in pages:
+		ops = ["BT", "/F1 10 Tf", "14 TL", "50 790 Td"]
+		for line in page_lines:
+			safe = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+			ops.append(f"({safe}) Tj T*")
+		ops.append("ET")
+		stream = "\n".join(ops).encode("latin-1", "replace")
+		content_id = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+		page_ids.append(add(
+			b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 842] "
+			b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_id, font_id, content_id)
+		))
+	kids = b" ".join(b"%d 0 R" % pid for pid in page_ids)
+	objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+	catalog_id = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+	out = io.BytesIO()
+	out.write(b"%PDF-1.4\n")
+	offsets = []
+	for number, body in enumerate(objects, start=1):
+		offsets.append(out.tell())
+		out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+	xref = out.tell()
+	out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+	for offset in offsets:
+		out.write(b"%010d 00000 n \n" % offset)
+	out.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog_id, xref))
+	return out.getvalue()
+
+
+def make_docx(text: str) -> bytes:
+	"""Minimal DOCX (one paragraph per line), enough for docx2txt."""
+	paragraphs = "".join(
+		f"<w:p><w:r><w:t xml:space=\"preserve\">{escape(line)}</w:t></w:r></w:p>"
+		for line in text.splitlines()
+	)
+	document = (
+		'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+		'<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+		f"<w:body>{paragraphs}</w:body></w:document>"
+	)
+	content_types = (
+		'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+		'<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+		'<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+		'<Default Extension="xml" ContentType="application/xml"/>'
+		'<Override PartName="/word/document.xml" '
+		'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+		"</Types>"
+	)
+	rels = (
+		'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+		'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+		'<Relationship Id="rId1" '
+		'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+		'Target="word/document.xml"/>'
+		"</Relationships>"
+	)
+	out = io.BytesIO()
+	with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as archive:
+		archive.writestr("[Content_Types].xml", content_types)
+		archive.writestr("_rels/.rels", rels)
+		archive.writestr("word/document.xml", document)
+	return out.getvalue()
@@ -0,0 +1,203 @@
+"""Load driver for the interview-prep API.
+
+Runs concurrent interview sessions (/analyze -> N x /chat/next -> /chat/score)
+and reports throughput and p50/p95/p99 latency per endpoint, plus the backend's
+per-stage breakdown (parse, split, embed, index, retrieve, generate, score).
+
+By default the backend runs in-process with deterministic fake embedding and
+chat backends, so no Cohere/OpenRouter calls are made:
+
+	python bench/run.py --sessions 20 --concurrency 10 --turns 4
+
+Pass --base-url to drive an already running server instead (its real backends
+are used and the stage breakdown comes from its /stats/stages endpoint).
+
+httpx's in-process ASGI transport buffers whole responses, so the client-side
+"first token" figure is only meaningful with --base-url; in-process runs should
+read the backend's generate_first_token stage instead.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import httpx
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from fixtures import JOB_DESCRIPTION, make_docx, make_pdf, resume_text
+
+
+PDF = "application/pdf"
+DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+def percentile(values, pct):
+	if not values:
+		return 0.0
+	ordered = sorted(values)
+	rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+	return ordered[rank]
+
+
+class Recorder:
+	def __init__(self):
+		self.latencies = defaultdict(list)
+		self.errors = defaultdict(int)
+
+	async def timed(self, name, coro):
+		start = time.perf_counter()
+		try:
+			resp = await coro
+			resp.raise_for_status()
+			return resp
+		except Exception:
+			self.errors[name] += 1
+			raise
+		finally:
+			self.latencies[name].append(time.perf_counter() - start)
+
+
+async def read_stream(resp):
+	"""Consume an NDJSON stream; returns (time to first token, done event)."""
+	first_token = None
+	done = None
+	async for line in resp.aiter_lines():
+		if not line.strip():
+			continue
+		event = json.loads(line)
+		if event["type"] == "token" and first_token is None:
+			first_token = time.perf_counter()
+		elif event["type"] == "done":
+			done = event
+		elif event["type"] == "error":
+			raise RuntimeError(event["detail"])
+	return first_token, done
+
+
+async def run_session(client, recorder, index, args):
+	text = resume_text(seed=index if args.unique_docs else 0)
+	if args.docx and index % 2:
+		payload, content_type, filename = make_docx(text), DOCX, f"cv-{index}.docx"
+	else:
+		payload, content_type, filename = make_pdf(text), PDF, f"cv-{index}.pdf"
+
+	resp = await recorder.timed("/analyze", client.post(
+		"/analyze",
+		files={"resume": (filename, payload, content_type)},
+		data={"job_description": JOB_DESCRIPTION},
+	))
+	headers = {"X-Session-Id": resp.json()["session_id"]}
+
+	answer = ""
+	for turn in range(args.turns):
+		if args.stream:
+			start = time.perf_counter()
+			try:
+				async with client.stream("POST", "/chat/next/stream", json={"user_answer": answer}, headers=headers) as resp:
+					resp.raise_for_status()
+					first_token, _ = await read_stream(resp)
+			except Exception:
+				recorder.errors["/chat/next/stream"] += 1
+				raise
+			end = time.perf_counter()
+			recorder.latencies["/chat/next/stream"].append(end - start)
+			if first_token is not None:
+				recorder.latencies["/chat/next/stream (first token)"].append(first_token - start)
+		else:
+			await recorder.timed("/chat/next", client.post("/chat/next", json={"user_answer": answer}, headers=headers))
+		answer = f"In project {turn + 1} I profiled the pipeline, batched the embedding calls and cached results."
+
+	await recorder.timed("/chat/score", client.post("/chat/score", headers=headers))
+
+
+def print_report(recorder, elapsed, stages):
+	print(f"\nWall time: {elapsed:.2f}s\n")
+	header = f"{'endpoint':36} {'n':>5} {'err':>4} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+	print(header)
+	print("-" * len(header))
+	for name, values in recorder.latencies.items():
+		print(
+			f"{name:36} {len(values):5d} {recorder.errors.get(name, 0):4d} {len(values) / elapsed:8.2f} "
+			f"{1000 * percentile(values, 50):9.1f} {1000 * percentile(values, 95):9.1f} {1000 * percentile(values, 99):9.1f}"
+		)
+
+	print(f"\n{'stage':28} {'n':>6} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+	print("-" * 74)
+	for name, s in sorted(stages.items()):
+		print(f"{name:28} {s['count']:6d} {s['mean_ms']:9.2f} {s['p50_ms']:9.2f} {s['p95_ms']:9.2f} {s['p99_ms']:9.2f}")
+
+
+def in_process_app(args):
+	"""Import the backend with fake backends and throwaway caches."""
+	cache_dir = tempfile.mkdtemp(prefix="interview-bench-")
+	os.environ.setdefault("EMBEDDING_CACHE_PATH", os.path.join(cache_dir, "embeddings.sqlite3"))
+	os.environ.setdefault("INDEX_CACHE_DIR", os.path.join(cache_dir, "indexes"))
+	sys.path.insert(0, os.path.join(HERE, "..", "backend"))
+
+	import LLM
+	import Timings
+	from fakes import FakeChatModel, FakeEmbeddings
+
+	LLM.use_backends(
+		embeddings=FakeEmbeddings(size=384, latency=args.embed_latency_ms / 1000),
+		chat_model=FakeChatModel(
+			first_token_latency=args.llm_first_token_ms / 1000,
+			token_latency=args.llm_token_ms / 1000,
+		),
+	)
+	Timings.reset()
+	return LLM.app
+
+
+async def main(args):
+	if args.base_url:
+		client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+	else:
+		app = in_process_app(args)
+		client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=args.timeout)
+
+	recorder = Recorder()
+	semaphore = asyncio.Semaphore(args.concurrency)
+
+	async def bounded(index):
+		async with semaphore:
+			try:
+				await run_session(client, recorder, index, args)
+			except Exception as exc:
+				print(f"session {index} failed: {exc!r}")
+
+	async with client:
+		start = time.perf_counter()
+		await asyncio.gather(*(bounded(i) for i in range(args.sessions)))
+		elapsed = time.perf_counter() - start
+		stages = (await client.get("/stats/stages")).json()
+
+	print_report(recorder, elapsed, stages)
+
+
+def parse_args(argv=None):
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--base-url", help="Drive a running server instead of the in-process app")
+	parser.add_argument("--sessions", type=int, default=20)
+	parser.add_argument("--concurrency", type=int, default=10)
+	parser.add_argument("--turns", type=int, default=4)
+	parser.add_argument("--stream", action="store_true", help="Use /chat/next/stream and report time to first token")
+	parser.add_argument("--docx", action="store_true", help="Upload DOCX for every other session")
+	parser.add_argument("--unique-docs", action="store_true", help="Different CV per session, so caches miss")
+	parser.add_argument("--embed-latency-ms", type=float, default=50.0)
+	parser.add_argument("--llm-first-token-ms", type=float, default=300.0)
+	parser.add_argument("--llm-token-ms", type=float, default=5.0)
+	parser.add_argument("--timeout", type=float, default=300.0)
+	return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+	asyncio.run(main(parse_args()))
@@ -17,6 +17,11 @@ document.addEventListener('DOMContentLoaded', () => {
   });
 
   const apiBase = 'http://127.0.0.1:8000';
+  let sessionId = null;
+
+  const sessionHeaders = (headers = {}) => (
+    sessionId ? { ...headers, 'X-Session-Id': sessionId } : headers
+  );
 
   const setStatus = (text, color = '') => {
     resumeStatus.textContent = text;
@@ -50,6 +55,7 @@ document.addEventListener('DOMContentLoaded', () => {
     div.textContent = text;
     chatWindow.appendChild(div);
     chatWindow.scrollTop = chatWindow.scrollHeight;
+    return div;
   };
 
   if (!analyzeBtn || !sendBtn || !chatInput || !chatWindow) {
@@ -108,6 +114,7 @@ document.addEventListener('DOMContentLoaded', () => {
       console.log('Response received:', resp.status);
       if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
       const data = await resp.json();
+      sessionId = data.session_id;
 
       setStatus('Uploaded. Initializing chat…', '#10b981');
 
@@ -136,20 +143,55 @@ document.addEventListener('DOMContentLoaded', () => {
     return false; 
   });
 
+  // Reads an NDJSON response line by line, calling onEvent for each parsed event.
+  const readNdjson = async (resp, onEvent) => {
+    const reader = resp.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      let newline;
+      while ((newline = buffer.indexOf('\n')) >= 0) {
+        const line = buffer.slice(0, newline).trim();
+        buffer = buffer.slice(newline + 1);
+        if (line) onEvent(JSON.parse(line));
+      }
+    }
+    if (buffer.trim()) onEvent(JSON.parse(buffer));
+  };
+
+  // Streams the next question into a new bot bubble and resolves with the final payload.
   const fetchChatNext = async (userText) => {
-    const resp = await fetch(`${apiBase}/chat/next`, {
+    const resp = await fetch(`${apiBase}/chat/next/stream`, {
       method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
+      headers: sessionHeaders({ 'Content-Type': 'application/json' }),
       body: JSON.stringify({ user_answer: userText }),
     });
     if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
-    return resp.json();
+
+    const bubble = appendMessage('bot', '');
+    let result = null;
+    await readNdjson(resp, (event) => {
+      if (event.type === 'token') {
+        bubble.textContent += event.text;
+        chatWindow.scrollTop = chatWindow.scrollHeight;
+      } else if (event.type === 'done') {
+        result = event;
+      } else if (event.type === 'error') {
+        throw new Error(event.detail);
+      }
+    });
+    if (!result) throw new Error('Stream ended early');
+    bubble.textContent = result.question || bubble.textContent;
+    return result;
   };
 
   const fetchScore = async () => {
     const resp = await fetch(`${apiBase}/chat/score`, {
       method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
+      headers: sessionHeaders({ 'Content-Type': 'application/json' }),
     });
     if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
     return resp.json();
@@ -158,15 +200,16 @@ document.addEventListener('DOMContentLoaded', () => {
   const fetchReset = async () => {
     const resp = await fetch(`${apiBase}/reset`, {
       method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
+      headers: sessionHeaders({ 'Content-Type': 'application/json' }),
     });
     if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+    sessionId = null;
     return resp.json();
   };
 
   const bootstrapChat = async () => {
     chatWindow.innerHTML = '';
-    appendMessage('bot', 'Analyzing your profile…');
+    const placeholder = appendMessage('bot', 'Analyzing your profile…');
     questionCount = 0;
     interviewDone = false;
     chatInput.disabled = false;
@@ -174,7 +217,8 @@ document.addEventListener('DOMContentLoaded', () => {
     setScore('Score:');  // Reset score for new interview
     try {
       const data = await fetchChatNext('');
-      appendMessage('bot', data.question || 'Let us start the mock interview.');
+      placeholder.remove();
+      if (!data.question) appendMessage('bot', 'Let us start the mock interview.');
       recordBotQuestion();
       setStatus('Chat ready. Ask or respond to proceed.', '#10b981');
     } catch (err) {
@@ -198,8 +242,7 @@ document.addEventListener('DOMContentLoaded', () => {
     sendBtn.disabled = true;
 
     try {
-      const data = await fetchChatNext(userText);
-      appendMessage('bot', data.question || '');
+      await fetchChatNext(userText);
       recordBotQuestion();
       if (interviewDone) {
         setScore('Score: calculating...');
@@ -0,0 +1,291 @@
+import argparse
+import math
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from sqlalchemy import text
+
+# Add parent directory to path to import db modules
+sys.path.append(str(Path(__file__).parent.parent))
+from db.session import engine
+
+# Bars of history replayed before the first new bar in incremental mode. The
+# EMA / Wilder recursions forget their seed geometrically: after 250 bars the
+# slowest ones keep (25/27)^250 ~ 4e-9 (EMA 26) and (13/14)^250 ~ 1e-8 (RSI 14)
+# of it, so the result matches a full recompute to well below display precision.
+WARMUP_BARS = 250
+
+# Symbols computed together in one set of NumPy arrays
+SYMBOL_BATCH = 200
+
+# Rows per upsert statement
+UPSERT_CHUNK = 10000
+
+INDICATOR_COLUMNS = [
+    "sma_20", "sma_50", "ema_12", "ema_26", "rsi_14",
+    "macd", "macd_signal", "macd_histogram",
+    "bb_upper", "bb_middle", "bb_lower",
+    "stoch_k", "stoch_d",
+]
+
+
+# ============================================
+# STEP 1: VECTORIZED INDICATORS
+# ============================================
+# Every function takes a 2-D float array (symbols x bars). Symbols with shorter
+# history are left-padded with NaN, and any window touching NaN is NaN, so one
+# set of array operations serves all symbols at once.
+
+def rolling_window(values, period):
+    """(symbols, bars, period) view; the first period-1 bars are NaN-padded."""
+    padded = np.concatenate([np.full((values.shape[0], period - 1), np.nan), values], axis=1)
+    return sliding_window_view(padded, period, axis=1)
+
+
+def sma(values, period):
+    return rolling_window(values, period).mean(axis=-1)
+
+
+def smoothed(values, period, alpha):
+    """
+    Exponential smoothing seeded with the SMA of the first `period` values.
+    alpha = 2/(period+1) gives the EMA; alpha = 1/period gives Wilder's smoothing.
+    The recursion runs over bars, but each step is one vector op across all symbols.
+    """
+    seed = sma(values, period)
+    out = np.full_like(values, np.nan)
+    prev = np.full(values.shape[0], np.nan)
+    for t in range(values.shape[1]):
+        prev = np.where(np.isnan(prev), seed[:, t], prev + alpha * (values[:, t] - prev))
+        out[:, t] = prev
+    return out
+
+
+def ema(values, period):
+    return smoothed(values, period, 2 / (period + 1))
+
+
+def rsi(close, period=14):
+    """Wilder's RSI: average gain / loss smoothed with alpha = 1/period."""
+    delta = np.diff(close, axis=1, prepend=np.nan)
+    gain = np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0))
+    loss = np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0))
+    avg_gain = smoothed(gain, period, 1 / period)
+    avg_loss = smoothed(loss, period, 1 / period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        # No losses in the window: RSI is 100 by definition
+        return np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + rs))
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(line, signal)
+    return line, signal_line, line - signal_line
+
+
+def bollinger(close, period=20, width=2):
+    windows = rolling_window(close, period)
+    middle = windows.mean(axis=-1)
+    std = windows.std(axis=-1)  # population std, as in the usual definition
+    return middle + width * std, middle, middle - width * std
+
+
+def stochastic(high, low, close, k_period=14, d_period=3):
+    highest = rolling_window(high, k_period).max(axis=-1)
+    lowest = rolling_window(low, k_period).min(axis=-1)
+    spread = highest - lowest
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Flat window (high == low): no position in the range, report the midpoint
+        k = np.where(spread == 0, 50.0, 100 * (close - lowest) / spread)
+    return k, sma(k, d_period)
+
+
+def compute_indicators(high, low, close):
+    """All technical_indicators columns for a (symbols x bars) batch, as a dict of 2-D arrays."""
+    macd_line, macd_signal, macd_histogram = macd(close)
+    bb_upper, bb_middle, bb_lower = bollinger(close)
+    stoch_k, stoch_d = stochastic(high, low, close)
+    return {
+        "sma_20": sma(close, 20),
+        "sma_50": sma(close, 50),
+        "ema_12": ema(close, 12),
+        "ema_26": ema(close, 26),
+        "rsi_14": rsi(close, 14),
+        "macd": macd_line,
+        "macd_signal": macd_signal,
+        "macd_histogram": macd_histogram,
+        "bb_upper": bb_upper,
+        "bb_middle": bb_middle,
+        "bb_lower": bb_lower,
+        "stoch_k": stoch_k,
+        "stoch_d": stoch_d,
+    }
+
+
+# ============================================
+# STEP 2: LOAD PRICE BARS
+# ============================================
+def get_all_symbols(conn):
+    return [row[0] for row in conn.execute(text("SELECT DISTINCT symbol FROM stock_prices ORDER BY symbol"))]
+
+
+def load_bars(conn, symbols, incremental=True, warmup=WARMUP_BARS):
+    """
+    Load price bars for many symbols in one query.
+    Incremental: only bars newer than the symbol's latest technical_indicators row,
+    plus `warmup` older bars to prime the indicators. Symbols with nothing new are skipped.
+
+    Returns: dict symbol -> (times, high, low, close, last_time)
+    """
+    query = text("""
+        WITH last AS (
+            SELECT s.symbol,
+                   (SELECT MAX(ti.time) FROM technical_indicators ti WHERE ti.symbol = s.symbol) AS last_time
+            FROM unnest(CAST(:symbols AS text[])) AS s(symbol)
+        ),
+        pending AS (
+            SELECT l.symbol, l.last_time,
+                   (SELECT COUNT(*) FROM stock_prices p
+                    WHERE p.symbol = l.symbol
+                    AND (l.last_time IS NULL OR p.time > l.last_time)) AS new_bars
+            FROM last l
+        ),
+        numbered AS (
+            SELECT p.symbol, p.time, p.high, p.low, p.close, n.last_time, n.new_bars,
+                   ROW_NUMBER() OVER (PARTITION BY p.symbol ORDER BY p.time DESC) AS rn
+            FROM stock_prices p
+            JOIN pending n ON n.symbol = p.symbol AND n.new_bars > 0
+        )
+        SELECT symbol, time, high, low, close, last_time
+        FROM numbered
+        WHERE rn <= new_bars + :warmup
+        ORDER BY symbol, time
+    """)
+    full_query = text("""
+        SELECT symbol, time, high, low, close, NULL AS last_time
+        FROM stock_prices
+        WHERE symbol = ANY(:symbols)
+        ORDER BY symbol, time
+    """)
+
+    if incremental:
+        result = conn.execute(query, {'symbols': list(symbols), 'warmup': warmup})
+    else:
+        result = conn.execute(full_query, {'symbols': list(symbols)})
+
+    rows_by_symbol = {}
+    for row in result:
+        rows_by_symbol.setdefault(row[0], []).append(row[1:])
+
+    bars = {}
+    for symbol, rows in rows_by_symbol.items():
+        times = [r[0] for r in rows]
+        values = np.array([[r[1], r[2], r[3]] for r in rows], dtype=float)
+        bars[symbol] = (times, values[:, 0], values[:, 1], values[:, 2], rows[0][4])
+    return bars
+
+
+def stack(series, width):
+    """Right-align 1-D series of different lengths into a NaN-padded (len(series) x width) array."""
+    out = np.full((len(series), width), np.nan)
+    for i, values in enumerate(series):
+        out[i, width - len(values):] = values
+    return out
+
+
+# ============================================
+# STEP 3: BULK UPSERT
+# ============================================
+def upsert_indicators(conn, rows):
+    """
+    Upsert rows (symbol, time, *INDICATOR_COLUMNS) with one statement per chunk:
+    each column is sent as an array and unnested server-side.
+    Requires a unique constraint on technical_indicators (symbol, time).
+    """
+    columns = ["symbol", "time"] + INDICATOR_COLUMNS
+    casts = ["text[]", "timestamptz[]"] + ["double precision[]"] * len(INDICATOR_COLUMNS)
+    query = text(f"""
+        INSERT INTO technical_indicators ({", ".join(columns)})
+        SELECT * FROM unnest({", ".join(f"CAST(:{c} AS {t})" for c, t in zip(columns, casts))})
+        ON CONFLICT (symbol, time) DO UPDATE SET
+            {", ".join(f"{c} = EXCLUDED.{c}" for c in INDICATOR_COLUMNS)}
+    """)
+
+    for start in range(0, len(rows), UPSERT_CHUNK):
+        chunk = rows[start:start + UPSERT_CHUNK]
+        conn.execute(query, {c: [row[i] for row in chunk] for i, c in enumerate(columns)})
+
+
+def indicator_rows(symbols, bars, indicators):
+    """Rows to write: bars after last_time only (all bars on a full run). NaN becomes NULL."""
+    rows = []
+    for i, symbol in enumerate(symbols):
+        times, _, _, _, last_time = bars[symbol]
+        offset = indicators["sma_20"].shape[1] - len(times)
+        columns = [indicators[c][i, offset:].tolist() for c in INDICATOR_COLUMNS]
+        for j, bar_time in enumerate(times):
+            if last_time is not None and bar_time <= last_time:
+                continue  # warm-up bar, already stored
+            # .tolist() gives Python floats; the driver can't adapt numpy scalars
+            rows.append([symbol, bar_time] + [None if math.isnan(col[j]) else col[j] for col in columns])
+    return rows
+
+
+# ============================================
+# STEP 4: REFRESH
+# ============================================
+def refresh_indicators(symbols=None, incremental=True, warmup=WARMUP_BARS):
+    """
+    Compute and store technical indicators from stock_prices.
+    - incremental=True: only bars added since the last run (plus warm-up history)
+    - incremental=False: recompute every bar (backfill)
+
+    Returns: number of rows written
+    """
+    start = time.perf_counter()
+    with engine.connect() as conn:
+        if symbols is None:
+            symbols = get_all_symbols(conn)
+
+    mode = "incremental" if incremental else "full"
+    print(f"🔢 Refreshing indicators for {len(symbols)} symbols ({mode})...")
+
+    written = 0
+    for batch_start in range(0, len(symbols), SYMBOL_BATCH):
+        batch = symbols[batch_start:batch_start + SYMBOL_BATCH]
+        # One transaction per batch: a failure doesn't leave a batch half-written
+        with engine.begin() as conn:
+            bars = load_bars(conn, batch, incremental=incremental, warmup=warmup)
+            if not bars:
+                continue
+
+            batch_symbols = list(bars)
+            width = max(len(bars[s][0]) for s in batch_symbols)
+            high = stack([bars[s][1] for s in batch_symbols], width)
+            low = stack([bars[s][2] for s in batch_symbols], width)
+            close = stack([bars[s][3] for s in batch_symbols], width)
+
+            indicators = compute_indicators(high, low, close)
+            rows = indicator_rows(batch_symbols, bars, indicators)
+            upsert_indicators(conn, rows)
+            written += len(rows)
+        print(f"   ✅ {batch_start + len(batch)}/{len(symbols)} symbols, {written} rows")
+
+    print(f"💾 Wrote {written} indicator rows in {time.perf_counter() - start:.1f}s")
+    return written
+
+
+# ============================================
+# RUN
+# ============================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute technical_indicators from stock_prices")
+    parser.add_argument("--full", action="store_true", help="recompute all history instead of new bars only")
+    parser.add_argument("--symbols", nargs="+", help="limit to these symbols (default: all)")
+    args = parser.parse_args()
+
+    refresh_indicators(args.symbols, incremental=not args.full)
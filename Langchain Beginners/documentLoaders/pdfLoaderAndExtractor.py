@@ -1,22 +1,43 @@
 # from langchain_community.document_loaders import PDFPlumberLoader
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import PromptTemplate
-from langchain_core.runnables import RunnableBranch, RunnableLambda
+from langchain_core.runnables import RunnableBranch, RunnableLambda, RunnableParallel
 from dotenv import load_dotenv
 from langchain_core.output_parsers import StrOutputParser
-from langchain_community.document_loaders import UnstructuredPDFLoader
+from pdfPageExtractor import extract_pdf_text
 from sqlalchemy import text
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 from prompts import FINANCIAL_EXTRACTION_PROMPT, TRADING_ADVISORY_PROMPT
 
 # Add parent directory to path to import db modules
 sys.path.append(str(Path(__file__).parent.parent))
-from db.session import engine
 
 load_dotenv()
 
+# Keep importing this module cheap: OCR workers are spawned processes that
+# re-import the main script, so the DB engine and the OpenAI client library
+# (~2 s of imports) are only loaded when first used.
+def get_engine():
+    from db.session import engine
+    return engine
+
+
+def openrouter_model(model, temperature):
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        base_url="https://openrouter.ai/api/v1",
+        default_headers={
+            "HTTP-Referer": "http://localhost",
+            "X-Title": "LangChain Learning Project"
+        }
+    )
+
 # ============================================
 # STEP 1: GET LATEST REPORT METADATA
 # ============================================
@@ -36,24 +57,29 @@ def get_latest_report_metadata(symbol, report_type='Quarterly'):
         LIMIT 1
     """)
     
-    with engine.connect() as conn:
+    with get_engine().connect() as conn:
         result = conn.execute(query, {'symbol': symbol, 'report_type': report_type})
         row = result.fetchone()
         
         if not row:
             return None
         
-        # Return as dictionary for easy access
-        return {
-            'id': row[0],
-            'symbol': row[1],
-            'report_type': row[2],
-            'year': row[3],
-            'period': row[4],
-            'file_path': row[5],
-            'extracted_data': row[6],  # This will be None if not extracted yet
-            'extracted_at': row[7]
-        }
+        return metadata_from_row(row)
+
+
+def metadata_from_row(row):
+    """Metadata row (id, symbol, report_type, year, period, file_path, extracted_data, extracted_at) as a dict."""
+    # Return as dictionary for easy access
+    return {
+        'id': row[0],
+        'symbol': row[1],
+        'report_type': row[2],
+        'year': row[3],
+        'period': row[4],
+        'file_path': row[5],
+        'extracted_data': row[6],  # This will be None if not extracted yet
+        'extracted_at': row[7]
+    }
 
 
 # ============================================
@@ -97,22 +123,14 @@ def extract_and_save_to_db(metadata):
     """
     print(f"📄 Loading PDF: {metadata['file_path']}")
     
-    # Load PDF
-    loader = UnstructuredPDFLoader(metadata['file_path'], strategy="ocr_only")
-    docs = loader.load()
+    # Load PDF: text layer where there is one, page-parallel OCR for scanned pages,
+    # every page cached on disk so a rerun picks up where a failed one stopped
+    report_text = extract_pdf_text(metadata['file_path'])
     
     print("🤖 Extracting financial data with LLM #1...")
     
     # Setup LLM #1
-    model = ChatOpenAI(
-        model="xiaomi/mimo-v2-flash:free",
-        temperature=0.4,
-        base_url="https://openrouter.ai/api/v1",
-        default_headers={
-            "HTTP-Referer": "http://localhost",
-            "X-Title": "LangChain Learning Project"
-        }
-    )
+    model = openrouter_model("xiaomi/mimo-v2-flash:free", temperature=0.4)
     
     prompt = PromptTemplate(
         template=FINANCIAL_EXTRACTION_PROMPT,
@@ -123,7 +141,7 @@ def extract_and_save_to_db(metadata):
     chain = prompt | model | parser
     
     # Extract data
-    extracted_data = chain.invoke({"report_text": docs[0].page_content})
+    extracted_data = chain.invoke({"report_text": report_text})
     
     # Save to database
     print("💾 Saving extracted data to database...")
@@ -134,7 +152,7 @@ def extract_and_save_to_db(metadata):
         WHERE id = :id
     """)
     
-    with engine.connect() as conn:
+    with get_engine().connect() as conn:
         conn.execute(update_query, {
             'data': extracted_data,
             'timestamp': datetime.now(),
@@ -149,38 +167,101 @@ def extract_and_save_to_db(metadata):
 # ============================================
 # STEP 4: GET STOCK PRICES (LAST 30 DAYS)
 # ============================================
+# Horizons (in trading days, i.e. price rows) shown to LLM #2 next to the indicators
+PRICE_WINDOWS = (7, 30, 90, 365)
+
+# Per-window stats computed in the database: one row per (symbol, window) comes
+# back instead of every OHLCV row. Windows count the latest N rows per symbol,
+# the same rows the old "ORDER BY time DESC LIMIT :days" query read.
+PRICE_WINDOWS_QUERY = text("""
+    WITH recent AS (
+        SELECT symbol, open, high, low, close, volume, rn
+        FROM (
+            SELECT symbol, open, high, low, close, volume,
+                   ROW_NUMBER() OVER (PARTITION BY symbol ORDER BY time DESC) AS rn
+            FROM stock_prices
+            WHERE symbol = ANY(:symbols)
+        ) numbered
+        WHERE rn <= :max_window
+    ),
+    windowed AS (
+        SELECT r.symbol, w.days,
+               (array_agg(r.close ORDER BY r.rn))[1] AS current_price,
+               (array_agg(r.open ORDER BY r.rn DESC))[1] AS open_price,
+               (array_agg(r.close ORDER BY r.rn DESC))[1] AS first_close,
+               MAX(r.high) AS high_price,
+               MIN(r.low) AS low_price,
+               COALESCE(SUM(r.volume), 0) AS volume,
+               COUNT(*) AS bars
+        FROM recent r
+        JOIN unnest(CAST(:windows AS int[])) AS w(days) ON r.rn <= w.days
+        GROUP BY r.symbol, w.days
+    )
+    SELECT symbol, days, current_price, open_price, high_price, low_price, volume,
+           ROUND(CAST((current_price - first_close) * 100 / NULLIF(first_close, 0) AS numeric), 2) AS price_change_pct,
+           bars
+    FROM windowed
+    ORDER BY symbol, days
+""")
+
+
+def fetch_price_windows(conn, symbols, windows=PRICE_WINDOWS):
+    """
+    Run PRICE_WINDOWS_QUERY for many symbols and windows on an open connection.
+    Returns: dict symbol -> {days: stats dict} (symbols without prices are absent)
+    """
+    windows = sorted({int(days) for days in windows})
+    result = conn.execute(PRICE_WINDOWS_QUERY, {
+        'symbols': list(symbols),
+        'windows': windows,
+        'max_window': windows[-1]
+    })
+    
+    stats = {}
+    for row in result:
+        stats.setdefault(row[0], {})[row[1]] = {
+            'current_price': float(row[2]),
+            'open_price': float(row[3]),
+            'high_price': float(row[4]),
+            'low_price': float(row[5]),
+            'volume': int(row[6]),
+            'price_change_pct': float(row[7]) if row[7] is not None else 0.0,
+            'bars': row[8]  # fewer than days when the history is shorter
+        }
+    return stats
+
+
+def get_stock_price_windows(symbol, windows=PRICE_WINDOWS):
+    """
+    Get price stats for several look-back windows in one query.
+    Returns: dict days -> dict with current_price, open_price, high_price, low_price,
+             volume, price_change_pct, bars (empty dict if no price data)
+    """
+    with get_engine().connect() as conn:
+        return fetch_price_windows(conn, [symbol], windows).get(symbol, {})
+
+
 def get_stock_prices(symbol, days=30):
     """
     Get stock prices for the last N days from database.
     Returns: dict with current_price, open_price, high, low, volume, price_change_pct
     """
-    query = text("""
-        SELECT time, open, high, low, close, volume
-        FROM stock_prices
-        WHERE symbol = :symbol
-        ORDER BY time DESC
-        LIMIT :days
-    """)
-    
-    with engine.connect() as conn:
-        result = conn.execute(query, {'symbol': symbol, 'days': days})
-        rows = result.fetchall()
-        
-        if not rows:
-            return None
-        
-        # Latest price is first row, oldest is last
-        latest = rows[0]
-        oldest = rows[-1]
-        
-        return {
-            'current_price': float(latest[4]),  # close
-            'open_price': float(oldest[1]),     # open from N days ago
-            'high_price': max(float(r[2]) for r in rows),
-            'low_price': min(float(r[3]) for r in rows),
-            'volume': sum(r[5] for r in rows if r[5]),
-            'price_change_pct': round(((float(latest[4]) - float(oldest[4])) / float(oldest[4])) * 100, 2)
-        }
+    return get_stock_price_windows(symbol, (days,)).get(days)
+
+
+def format_price_windows(price_windows):
+    """
+    Format multi-horizon stats for the prompt (appended to the technical indicators).
+    """
+    lines = []
+    for days, stats in sorted(price_windows.items()):
+        note = f" (only {stats['bars']} days of history)" if stats['bars'] < days else ""
+        lines.append(
+            f"- {days}-Day: {stats['price_change_pct']:+.2f}%, "
+            f"Range PKR {stats['low_price']:.2f} - {stats['high_price']:.2f}, "
+            f"Volume {stats['volume']:,}{note}"
+        )
+    return "\n".join(lines)
 
 
 # ============================================
@@ -202,15 +283,22 @@ def get_technical_indicators(symbol):
         LIMIT 1
     """)
     
-    with engine.connect() as conn:
+    with get_engine().connect() as conn:
         result = conn.execute(query, {'symbol': symbol})
         row = result.fetchone()
         
-        if not row:
-            return "Technical indicators not available"
-        
-        # Format indicators for the prompt
-        return f"""- 20-Day SMA: PKR {float(row[0]):.2f}
+        return format_indicators(row)
+
+
+def format_indicators(row):
+    """
+    Format one technical_indicators row (sma_20 ... stoch_d) for TRADING_ADVISORY_PROMPT.
+    """
+    if not row:
+        return "Technical indicators not available"
+    
+    # Format indicators for the prompt
+    return f"""- 20-Day SMA: PKR {float(row[0]):.2f}
 - 50-Day SMA: PKR {float(row[1]):.2f}
 - Trend: {'Bullish' if row[0] > row[1] else 'Bearish'} (SMA20 {'above' if row[0] > row[1] else 'below'} SMA50)
 - RSI (14): {float(row[4]):.1f} ({'Overbought' if row[4] > 70 else 'Oversold' if row[4] < 30 else 'Neutral'})
@@ -219,6 +307,24 @@ def get_technical_indicators(symbol):
 - Stochastic %K: {float(row[11]):.1f}, %D: {float(row[12]):.1f}"""
 
 
+# ============================================
+# STEP 5B: GET COMPANY INFO
+# ============================================
+def get_company_info(symbol):
+    """
+    Get company name and sector for the prompt.
+    Returns: dict with company_name, sector (falls back to symbol / "Unknown")
+    """
+    query = text("SELECT company_name, sector FROM symbols WHERE symbol = :symbol")
+    with get_engine().connect() as conn:
+        result = conn.execute(query, {'symbol': symbol})
+        row = result.fetchone()
+        return {
+            'company_name': row[0] if row else symbol,
+            'sector': row[1] if row else "Unknown"
+        }
+
+
 # ============================================
 # STEP 6: BUILD CONDITIONAL BRANCH (RUNNABLE)
 # ============================================
@@ -246,69 +352,53 @@ def build_extraction_branch():
 
 
 # ============================================
-# STEP 7: MAIN ANALYSIS FUNCTION
+# STEP 6B: BUILD PARALLEL DATA GATHERING (RUNNABLE)
 # ============================================
-def analyze_stock(symbol):
+def get_financial_data(symbol):
     """
-    Complete analysis pipeline:
-    1. Get metadata
-    2. Branch: Load cached OR Extract from PDF
-    3. Get stock prices
-    4. Get technical indicators
-    5. Send everything to LLM #2 for recommendation
-    
-    Returns: Trading recommendation from LLM #2
+    Metadata lookup followed by the extraction branch (the only legs that depend on each other).
+    Returns: dict with metadata and financial_data, or None if no report found
     """
-    print("\n" + "="*70)
-    print(f"🚀 STARTING ANALYSIS FOR: {symbol}")
-    print("="*70 + "\n")
-    
-    # Step 1: Get metadata
-    print("📊 Step 1: Getting report metadata...")
     metadata = get_latest_report_metadata(symbol)
     if not metadata:
-        return f"❌ No financial report found for {symbol}"
-    print(f"   Found: {metadata['year']} {metadata['period']}\n")
-    
-    # Step 2: Get or extract financial data (using branch)
-    print("📄 Step 2: Getting financial data...")
-    extraction_branch = build_extraction_branch()
-    financial_data = extraction_branch.invoke(metadata)
-    print()
-    
-    # Step 3: Get stock prices
-    print("📈 Step 3: Getting stock prices (last 30 days)...")
-    stock_data = get_stock_prices(symbol, days=30)
-    if not stock_data:
-        return f"❌ No price data found for {symbol}"
-    print(f"   Current: PKR {stock_data['current_price']:.2f}")
-    print(f"   30-Day Change: {stock_data['price_change_pct']}%\n")
-    
-    # Step 4: Get technical indicators
-    print("🔢 Step 4: Getting technical indicators...")
-    indicators = get_technical_indicators(symbol)
-    print("   ✅ Indicators loaded\n")
-    
-    # Step 5: Get company info for context
-    query = text("SELECT company_name, sector FROM symbols WHERE symbol = :symbol")
-    with engine.connect() as conn:
-        result = conn.execute(query, {'symbol': symbol})
-        row = result.fetchone()
-        company_name = row[0] if row else symbol
-        sector = row[1] if row else "Unknown"
+        return None
+    financial_data = build_extraction_branch().invoke(metadata)
+    return {'metadata': metadata, 'financial_data': financial_data}
+
+
+def build_data_gathering(days=30):
+    """
+    Create a RunnableParallel that fans out the independent inputs of LLM #2:
+    - Report metadata -> extraction branch
+    - Stock prices (the days window plus PRICE_WINDOWS, in one aggregated query)
+    - Technical indicators
+    - Company info
     
-    # Step 6: Send to LLM #2 for trading recommendation
-    print("💡 Step 5: Generating trading recommendation with LLM #2...")
+    Each leg runs on its own thread and borrows its own connection from the
+    engine's pool (a single connection can't be shared across threads), so the
+    wall-clock time is the slowest leg instead of the sum of all of them.
     
-    model = ChatOpenAI(
-        model="qwen/qwen-2-7b-instruct:free",
-        temperature=0.3,
-        base_url="https://openrouter.ai/api/v1",
-        default_headers={
-            "HTTP-Referer": "http://localhost",
-            "X-Title": "LangChain Learning Project"
-        }
+    Returns: RunnableParallel (invoke with the symbol)
+    """
+    return RunnableParallel(
+        report=RunnableLambda(get_financial_data),
+        price_windows=RunnableLambda(lambda symbol: get_stock_price_windows(symbol, PRICE_WINDOWS + (days,))),
+        indicators=RunnableLambda(get_technical_indicators),
+        company=RunnableLambda(get_company_info),
     )
+
+
+# ============================================
+# STEP 6C: BUILD ADVISORY CHAIN (LLM #2)
+# ============================================
+def build_advisory_chain():
+    """
+    Create the LLM #2 chain (prompt | model | parser).
+    The chain holds no per-call state, so one instance can serve many symbols and threads.
+    
+    Returns: Runnable taking the TRADING_ADVISORY_PROMPT variables
+    """
+    model = openrouter_model("qwen/qwen-2-7b-instruct:free", temperature=0.3)
     
     prompt = PromptTemplate(
         template=TRADING_ADVISORY_PROMPT,
@@ -319,23 +409,81 @@ def analyze_stock(symbol):
     )
     
     parser = StrOutputParser()
-    chain = prompt | model | parser
+    return prompt | model | parser
+
+
+def advisory_inputs(symbol, company, financial_data, stock_data, indicators, days=30, price_windows=None):
+    """
+    Build the TRADING_ADVISORY_PROMPT variables for one symbol.
+    price_windows (from get_stock_price_windows) adds multi-horizon stats to the indicators.
+    """
+    if price_windows:
+        indicators = f"{indicators}\n\nMulti-Horizon Price Stats:\n{format_price_windows(price_windows)}"
     
-    recommendation = chain.invoke({
+    return {
         "symbol": symbol,
-        "company_name": company_name,
-        "sector": sector,
+        "company_name": company['company_name'],
+        "sector": company['sector'],
         "current_price": stock_data['current_price'],
         "analysis_date": datetime.now().strftime("%Y-%m-%d"),
         "financial_metrics": financial_data,
-        "days": 30,
+        "days": days,
         "open_price": stock_data['open_price'],
         "high_price": stock_data['high_price'],
         "low_price": stock_data['low_price'],
         "price_change_pct": stock_data['price_change_pct'],
         "volume": stock_data['volume'],
         "technical_indicators": indicators
-    })
+    }
+
+
+# ============================================
+# STEP 7: MAIN ANALYSIS FUNCTION
+# ============================================
+def analyze_stock(symbol):
+    """
+    Complete analysis pipeline:
+    1. In parallel:
+       - Get metadata, then Branch: Load cached OR Extract from PDF
+       - Get stock prices
+       - Get technical indicators
+       - Get company info
+    2. Send everything to LLM #2 for recommendation
+    
+    Returns: Trading recommendation from LLM #2
+    """
+    print("\n" + "="*70)
+    print(f"🚀 STARTING ANALYSIS FOR: {symbol}")
+    print("="*70 + "\n")
+    
+    # Steps 1-4: Report (metadata -> branch), prices, indicators and company info, all at once
+    print("📊 Steps 1-4: Gathering report, prices, indicators and company info in parallel...")
+    start = time.perf_counter()
+    gathered = build_data_gathering(days=30).invoke(symbol)
+    print(f"   ✅ Gathered in {time.perf_counter() - start:.2f}s\n")
+    
+    report = gathered['report']
+    if not report:
+        return f"❌ No financial report found for {symbol}"
+    metadata = report['metadata']
+    financial_data = report['financial_data']
+    print(f"   Report: {metadata['year']} {metadata['period']}")
+    
+    price_windows = gathered['price_windows']
+    stock_data = price_windows.get(30)
+    if not stock_data:
+        return f"❌ No price data found for {symbol}"
+    print(f"   Current: PKR {stock_data['current_price']:.2f}")
+    print(f"   30-Day Change: {stock_data['price_change_pct']}%\n")
+    
+    # Step 5: Send to LLM #2 for trading recommendation
+    print("💡 Step 5: Generating trading recommendation with LLM #2...")
+    
+    chain = build_advisory_chain()
+    recommendation = chain.invoke(advisory_inputs(
+        symbol, gathered['company'], financial_data, stock_data, gathered['indicators'], days=30,
+        price_windows=price_windows
+    ))
     
     # Print results
     print("\n" + "="*70)
@@ -353,6 +501,121 @@ def analyze_stock(symbol):
     return recommendation
 
 
+# ============================================
+# STEP 8: BULK DATA FOR A WATCHLIST
+# ============================================
+def fetch_watchlist_data(symbols, days=30, report_type='Quarterly'):
+    """
+    Fetch everything analyze_stock needs for many symbols with four set-based
+    queries on one connection, instead of 4+ queries per symbol.
+    
+    Returns: dict symbol -> {metadata, stock_data, price_windows, indicators, company}
+             (metadata / stock_data are None when missing, like the single-symbol helpers)
+    """
+    metadata_query = text("""
+        SELECT DISTINCT ON (symbol)
+               id, symbol, report_type, year, period, file_path,
+               extracted_data, extracted_at
+        FROM financial_reports_metadata
+        WHERE symbol = ANY(:symbols)
+        AND report_type = :report_type
+        ORDER BY symbol, year DESC, period DESC
+    """)
+    
+    indicators_query = text("""
+        SELECT DISTINCT ON (symbol)
+               symbol, sma_20, sma_50, ema_12, ema_26, rsi_14,
+               macd, macd_signal, macd_histogram,
+               bb_upper, bb_middle, bb_lower,
+               stoch_k, stoch_d
+        FROM technical_indicators
+        WHERE symbol = ANY(:symbols)
+        ORDER BY symbol, time DESC
+    """)
+    
+    company_query = text("""
+        SELECT symbol, company_name, sector
+        FROM symbols
+        WHERE symbol = ANY(:symbols)
+    """)
+    
+    params = {'symbols': list(symbols)}
+    with get_engine().connect() as conn:
+        metadata = {row[1]: metadata_from_row(row)
+                    for row in conn.execute(metadata_query, {**params, 'report_type': report_type})}
+        
+        # Stats for every symbol and window come back already aggregated
+        price_windows = fetch_price_windows(conn, symbols, PRICE_WINDOWS + (days,))
+        
+        indicators = {row[0]: row[1:] for row in conn.execute(indicators_query, params)}
+        companies = {row[0]: row[1:] for row in conn.execute(company_query, params)}
+    
+    return {
+        symbol: {
+            'metadata': metadata.get(symbol),
+            'stock_data': price_windows.get(symbol, {}).get(days),
+            'price_windows': price_windows.get(symbol, {}),
+            'indicators': format_indicators(indicators.get(symbol)),
+            'company': {
+                'company_name': companies[symbol][0] if symbol in companies else symbol,
+                'sector': companies[symbol][1] if symbol in companies else "Unknown"
+            }
+        }
+        for symbol in symbols
+    }
+
+
+# ============================================
+# STEP 9: WATCHLIST ANALYSIS
+# ============================================
+def analyze_watchlist(symbols, days=30, max_concurrency=4):
+    """
+    Batch version of analyze_stock for a whole watchlist:
+    1. One bulk fetch for metadata, prices, indicators and company info
+    2. Per symbol, at most max_concurrency at a time:
+       Branch (load cached OR extract from PDF) -> LLM #2
+    
+    Yields: dict with symbol and recommendation (or error), as each symbol completes
+    """
+    symbols = list(dict.fromkeys(symbols))
+    
+    print(f"📊 Fetching data for {len(symbols)} symbols...")
+    start = time.perf_counter()
+    data = fetch_watchlist_data(symbols, days=days)
+    print(f"   ✅ Fetched in {time.perf_counter() - start:.2f}s\n")
+    
+    extraction_branch = build_extraction_branch()
+    chain = build_advisory_chain()
+    
+    def analyze_one(symbol):
+        symbol_data = data[symbol]
+        if not symbol_data['metadata']:
+            raise LookupError(f"No financial report found for {symbol}")
+        if not symbol_data['stock_data']:
+            raise LookupError(f"No price data found for {symbol}")
+        
+        financial_data = extraction_branch.invoke(symbol_data['metadata'])
+        return chain.invoke(advisory_inputs(
+            symbol, symbol_data['company'], financial_data,
+            symbol_data['stock_data'], symbol_data['indicators'], days=days,
+            price_windows=symbol_data['price_windows']
+        ))
+    
+    # max_concurrency caps in-flight LLM calls (free-tier rate limits)
+    pool = ThreadPoolExecutor(max_workers=max_concurrency)
+    futures = {pool.submit(analyze_one, symbol): symbol for symbol in symbols}
+    try:
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                yield {'symbol': symbol, 'recommendation': future.result()}
+            except Exception as e:
+                yield {'symbol': symbol, 'error': str(e)}
+    finally:
+        # Caller stopped early: don't start LLM calls nobody will read
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
 # ============================================
 # TESTING
 # ============================================
@@ -0,0 +1,178 @@
+import hashlib
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import pymupdf
+
+# Per-page text lives in <cache>/<file sha256>/<page>.txt, so a rerun (or a run
+# that crashed halfway) only processes the pages that aren't there yet.
+CACHE_DIR = Path(os.getenv("PDF_PAGE_CACHE_DIR", Path(__file__).parent / ".page_cache"))
+
+# A page with fewer characters than this in its text layer is treated as scanned
+MIN_TEXT_CHARS = 50
+
+OCR_DPI = 300
+OCR_LANG = "eng"
+
+# Total OCR processes for the whole program, however many threads call extract_pdf_text
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", os.cpu_count() or 1))
+
+
+# ============================================
+# STEP 1: FILE HASH + PAGE CACHE
+# ============================================
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def page_cache_path(cache_dir, file_hash, page_number):
+    return Path(cache_dir) / file_hash / f"{page_number:05d}.txt"
+
+
+def read_cached_page(cache_dir, file_hash, page_number):
+    path = page_cache_path(cache_dir, file_hash, page_number)
+    return path.read_text(encoding="utf-8") if path.exists() else None
+
+
+def write_cached_page(cache_dir, file_hash, page_number, page_text):
+    path = page_cache_path(cache_dir, file_hash, page_number)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write then rename: a crash mid-write never leaves a truncated page behind
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(page_text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+# ============================================
+# STEP 2: PER-PAGE EXTRACTION
+# ============================================
+def text_layer(page):
+    """Text layer of a page, or None if the page looks scanned."""
+    page_text = page.get_text()
+    return page_text if len(page_text.strip()) >= MIN_TEXT_CHARS else None
+
+
+def init_ocr_worker():
+    # One process per page already uses every core; stop Tesseract from also spawning threads
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+def ocr_page(file_path, page_number, file_hash, cache_dir, dpi=OCR_DPI, lang=OCR_LANG):
+    """
+    Process-pool worker: render one page and OCR it with Tesseract.
+    The result is cached before returning, so finished pages survive a crash elsewhere.
+    """
+    import pytesseract
+    from PIL import Image
+
+    with pymupdf.open(file_path) as doc:
+        pixmap = doc[page_number].get_pixmap(dpi=dpi)
+    image = Image.open(io.BytesIO(pixmap.tobytes("png")))
+    page_text = pytesseract.image_to_string(image, lang=lang)
+
+    write_cached_page(cache_dir, file_hash, page_number, page_text)
+    return page_number, page_text
+
+
+# ============================================
+# STEP 3: SHARED OCR POOL
+# ============================================
+_ocr_pool = None
+_ocr_pool_lock = threading.Lock()
+
+
+def get_ocr_pool():
+    """
+    One process pool shared by every caller: analyze_watchlist threads and
+    RunnableParallel legs all queue pages here, so at most OCR_WORKERS pages
+    are OCR'd at once instead of cpu_count per calling thread.
+    Workers are started with "spawn": callers are multithreaded (DB pool,
+    HTTP clients), and forking a process while another thread holds a lock
+    can deadlock the child. A spawned worker re-imports the main script, so
+    scripts using this pool keep heavy setup out of module level.
+    """
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            _ocr_pool = ProcessPoolExecutor(
+                max_workers=OCR_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_ocr_worker,
+            )
+        return _ocr_pool
+
+
+def reset_ocr_pool(pool):
+    """Drop a pool whose worker died so the next call starts a fresh one."""
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is pool:
+            _ocr_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ============================================
+# STEP 4: WHOLE DOCUMENT
+# ============================================
+def extract_pdf_text(file_path, cache_dir=CACHE_DIR):
+    """
+    Extract the text of every page of a PDF:
+    1. Cached pages are read from disk
+    2. Pages with a text layer are read directly (fast path)
+    3. Only the remaining (scanned) pages are OCR'd, in parallel on the shared process pool
+
+    Returns: all page texts joined in page order
+    Raises: RuntimeError listing the pages that failed (the others stay cached for the rerun)
+    """
+    file_hash = file_sha256(file_path)
+    pages = {}
+    needs_ocr = []
+
+    with pymupdf.open(file_path) as doc:
+        page_count = doc.page_count
+        for page_number in range(page_count):
+            cached = read_cached_page(cache_dir, file_hash, page_number)
+            if cached is not None:
+                pages[page_number] = cached
+                continue
+            page_text = text_layer(doc[page_number])
+            if page_text is None:
+                needs_ocr.append(page_number)
+            else:
+                write_cached_page(cache_dir, file_hash, page_number, page_text)
+                pages[page_number] = page_text
+
+    print(f"   {page_count} pages: {page_count - len(needs_ocr)} from cache / text layer, {len(needs_ocr)} to OCR")
+
+    failed = {}
+    if needs_ocr:
+        pool = get_ocr_pool()
+        futures = {
+            pool.submit(ocr_page, str(file_path), page_number, file_hash, str(cache_dir)): page_number
+            for page_number in needs_ocr
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            page_number = futures[future]
+            try:
+                _, pages[page_number] = future.result()
+            except BrokenProcessPool as e:
+                failed[page_number] = e
+                reset_ocr_pool(pool)
+            except Exception as e:
+                failed[page_number] = e
+            print(f"   🔍 OCR {done}/{len(needs_ocr)} pages")
+
+    if failed:
+        listed = ", ".join(f"{p + 1} ({type(e).__name__}: {e})" for p, e in sorted(failed.items()))
+        raise RuntimeError(f"OCR failed for page(s) {listed}; rerun to retry only those pages")
+
+    return "\n\n".join(pages[page_number] for page_number in range(page_count))